@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+from app.internal.executor import get_inference_executor
+
+logger = logging.getLogger(__name__)
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+
+class BatchStats:
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.max_batch_size = 0
+        self.total_queue_ms = 0.0
+        self.max_queue_ms = 0.0
+
+    def record(self, batch_size: int, queue_ms: List[float]) -> None:
+        self.batches += 1
+        self.items += batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.total_queue_ms += sum(queue_ms)
+        self.max_queue_ms = max([self.max_queue_ms, *queue_ms])
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "avg_queue_ms": self.total_queue_ms / self.items if self.items else 0.0,
+            "max_queue_ms": self.max_queue_ms,
+        }
+
+
+class MicroBatcher(Generic[ItemT, ResultT]):
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[List[ItemT]], List[ResultT]],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ):
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = BatchStats()
+
+        self._fn = fn
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+        return self._queue
+
+    async def submit(self, item: ItemT) -> ResultT:
+        queue = self._ensure_worker()
+        future = self._loop.create_future()
+        await queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Run the batch in the background so the next one can fill up meanwhile
+            task = self._loop.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[ItemT, asyncio.Future, float]]) -> None:
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        queue_ms = [(started - enqueued) * 1000 for _, _, enqueued in batch]
+        self.stats.record(len(batch), queue_ms)
+        logger.debug(
+            f"{self.name}: running batch of {len(batch)}, "
+            f"max queue time {max(queue_ms):.1f} ms"
+        )
+
+        try:
+            results = await get_inference_executor().run(
+                self._fn, [item for item, _, _ in batch]
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
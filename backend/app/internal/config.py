@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +16,76 @@ class GlobalConfig(BaseConfig):
     REDIS_URL: Optional[str] = None
     SESSION_TTL: Optional[int] = None
 
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    MAX_PDF_PAGES: int = 2000
+    PDF_PAGE_BATCH_SIZE: int = 16
+    PDF_EXTRACT_WORKERS: int = 1
+
+    PROCESS_WORKERS: int = 1
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_QUEUE_SIZE: int = 8
+    INFERENCE_RETRY_AFTER: int = 5
+
+    QA_BATCH_MAX_SIZE: int = 8
+    QA_BATCH_MAX_WAIT_MS: float = 5.0
+
+    ASK_BATCH_MAX_QUESTIONS: int = 16
+
+    QA_WINDOW_SIZE: int = 384
+    QA_WINDOW_STRIDE: int = 128
+    QA_MAX_QUESTION_TOKENS: int = 64
+    QA_MAX_WINDOWS: int = 64
+    QA_WINDOW_BATCH_SIZE: int = 16
+    QA_MAX_ANSWER_TOKENS: int = 30
+    QA_EARLY_EXIT_SCORE: Optional[float] = None
+    QA_WINDOW_CACHE_SIZE: int = 8
+
+    NER_MODEL_NAME: str = "dslim/bert-large-NER"
+    NER_CACHE_SIZE: int = 1024
+
+    EAGER_MODEL_LOADING: bool = True
+
+    INFERENCE_BACKEND: Literal["torch", "onnx", "onnx-int8"] = "torch"
+    QA_BACKEND: Optional[Literal["torch", "onnx", "onnx-int8"]] = None
+    NER_BACKEND: Optional[Literal["torch", "onnx", "onnx-int8"]] = None
+    EMBED_BACKEND: Optional[Literal["torch", "onnx", "onnx-int8"]] = None
+    ONNX_CACHE_DIR: str = "onnx_models"
+
+    INTRA_OP_THREADS: Optional[int] = None
+    INTER_OP_THREADS: int = 1
+    FAISS_OMP_THREADS: Optional[int] = None
+    TOKENIZERS_PARALLELISM: bool = False
+
+    CHUNK_MAX_TOKENS: Optional[int] = None
+    CHUNK_OVERLAP_TOKENS: int = 32
+
+    EMBED_BATCH_SIZE: int = 64
+    EMBED_ENCODE_BATCH_SIZE: int = 32
+    EMBED_QUERY_BATCH_MAX_SIZE: int = 32
+    EMBED_QUERY_BATCH_MAX_WAIT_MS: float = 2.0
+    EMBED_QUERY_CACHE_SIZE: int = 4096
+    INDEX_LOCK_LEASE: float = 30.0
+    INDEX_LOCK_POLL_INTERVAL: float = 0.5
+    FAISS_INDEX_CACHE_SIZE: int = 32
+
+    FAISS_INDEX_TYPE: Literal["auto", "flat", "hnsw", "ivfpq"] = "auto"
+    FAISS_HNSW_MIN_CHUNKS: int = 5_000
+    FAISS_IVFPQ_MIN_CHUNKS: int = 100_000
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_CONSTRUCTION: int = 80
+    FAISS_HNSW_EF_SEARCH: int = 64
+    FAISS_IVF_NLIST: Optional[int] = None
+    FAISS_IVF_NPROBE: int = 16
+    FAISS_IVF_MAX_TRAIN_POINTS: int = 20_000
+    FAISS_PQ_M: int = 48
+
+    EMBEDDINGS_DTYPE: Literal["float32", "float16", "int8"] = "float16"
+
 
 class DevConfig(GlobalConfig):
     model_config = SettingsConfigDict(env_prefix="DEV_")
@@ -30,6 +100,7 @@ class TestConfig(GlobalConfig):
     ALGORITHM: str = "HS256"
     REDIS_URL: str = "redis://localhost:6379/0"
     SESSION_TTL: int = 60
+    EAGER_MODEL_LOADING: bool = False
 
     model_config = SettingsConfigDict(env_prefix="TEST_")
 
@@ -0,0 +1,140 @@
+import logging
+import os
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.internal.config import config
+from app.internal.metrics import register_metrics
+
+if TYPE_CHECKING:
+    import faiss
+    import torch
+
+logger = logging.getLogger(__name__)
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+@dataclass
+class CpuSettings:
+    cores: int
+    process_workers: int
+    inference_workers: int
+    intra_op_threads: int
+    inter_op_threads: int
+    faiss_threads: int
+    tokenizers_parallelism: bool
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _read_cgroup_file(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    # cgroup v2 holds "<quota> <period>" with "max" for no limit, v1 splits
+    # them over two files with -1 for no limit
+    cpu_max = _read_cgroup_file(CGROUP_V2_CPU_MAX)
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+    else:
+        quota = _read_cgroup_file(CGROUP_V1_CPU_QUOTA)
+        period = _read_cgroup_file(CGROUP_V1_CPU_PERIOD)
+
+    try:
+        quota, period = int(quota), int(period)
+    except (TypeError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def available_cores() -> int:
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+
+    # Affinity still lists every host core under a container CPU quota
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cores = min(cores, max(1, int(limit)))
+    return cores
+
+
+@lru_cache()
+def get_cpu_settings() -> CpuSettings:
+    cores = available_cores()
+
+    # Every inference worker of every process may run a model at the same time
+    concurrent = config.PROCESS_WORKERS * config.INFERENCE_WORKERS
+    intra = config.INTRA_OP_THREADS or max(1, cores // concurrent)
+
+    return CpuSettings(
+        cores=cores,
+        process_workers=config.PROCESS_WORKERS,
+        inference_workers=config.INFERENCE_WORKERS,
+        intra_op_threads=intra,
+        inter_op_threads=config.INTER_OP_THREADS,
+        faiss_threads=config.FAISS_OMP_THREADS or intra,
+        tokenizers_parallelism=config.TOKENIZERS_PARALLELISM,
+    )
+
+
+def apply_cpu_settings() -> CpuSettings:
+    settings = get_cpu_settings()
+
+    # Read by the libraries when they are first imported
+    os.environ["TOKENIZERS_PARALLELISM"] = str(settings.tokenizers_parallelism).lower()
+    os.environ["OMP_NUM_THREADS"] = str(settings.intra_op_threads)
+    os.environ["MKL_NUM_THREADS"] = str(settings.intra_op_threads)
+
+    register_metrics("cpu", settings.as_dict)
+    logger.info(
+        f"CPU settings: {settings.cores} cores, "
+        f"{settings.process_workers} processes x "
+        f"{settings.inference_workers} inference workers, "
+        f"{settings.intra_op_threads} intra-op / "
+        f"{settings.inter_op_threads} inter-op threads, "
+        f"{settings.faiss_threads} faiss threads, "
+        f"tokenizers parallelism {settings.tokenizers_parallelism}"
+    )
+    return settings
+
+
+@lru_cache()
+def import_torch() -> "torch":
+    import torch
+
+    settings = get_cpu_settings()
+    torch.set_num_threads(settings.intra_op_threads)
+    try:
+        torch.set_num_interop_threads(settings.inter_op_threads)
+    except RuntimeError:
+        # Only possible before torch runs its first parallel operation
+        logger.warning("torch inter-op threads were already initialised")
+    return torch
+
+
+@lru_cache()
+def import_faiss() -> "faiss":
+    import faiss
+
+    faiss.omp_set_num_threads(get_cpu_settings().faiss_threads)
+    return faiss
+
+
+def init_inference_thread() -> None:
+    # OpenMP thread counts are per thread, so the setting made on import does
+    # not reach the executor threads that build and search indexes
+    import_faiss().omp_set_num_threads(get_cpu_settings().faiss_threads)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.internal.config import config
+from app.internal.cpu import init_inference_thread
+from app.internal.metrics import register_metrics
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WAIT_POLL_INTERVAL = 0.05
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        max_workers: int,
+        queue_size: int,
+        retry_after: int,
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        self.max_workers = max_workers
+        self.capacity = max_workers + queue_size
+        self.retry_after = retry_after
+
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="inference",
+            initializer=initializer,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self._pending >= self.capacity:
+                logger.warning(
+                    f"Inference queue full ({self._pending}/{self.capacity}), "
+                    "rejecting request"
+                )
+                raise HTTPException(
+                    status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Inference queue is full, please retry later",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._pending += 1
+
+        return await self._submit(fn, *args, **kwargs)
+
+    async def run_when_free(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # Background jobs wait for a slot instead of being shed like requests
+        while True:
+            with self._lock:
+                if self._pending < self.capacity:
+                    self._pending += 1
+                    break
+            await asyncio.sleep(WAIT_POLL_INTERVAL)
+
+        return await self._submit(fn, *args, **kwargs)
+
+    async def _submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        try:
+            future = self._pool.submit(partial(fn, *args, **kwargs))
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        # Release on completion of the work itself, not of the awaiting request
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "pending": self._pending,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache()
+def get_inference_executor() -> InferenceExecutor:
+    logger.info(
+        f"Starting inference executor with {config.INFERENCE_WORKERS} workers "
+        f"and queue size {config.INFERENCE_QUEUE_SIZE}"
+    )
+
+    executor = InferenceExecutor(
+        max_workers=config.INFERENCE_WORKERS,
+        queue_size=config.INFERENCE_QUEUE_SIZE,
+        retry_after=config.INFERENCE_RETRY_AFTER,
+        initializer=init_inference_thread,
+    )
+    register_metrics("inference_executor", executor.stats)
+    return executor
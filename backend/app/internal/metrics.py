@@ -0,0 +1,17 @@
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+MetricsProvider = Callable[[], Dict[str, Any]]
+
+_providers: Dict[str, MetricsProvider] = {}
+
+
+def register_metrics(name: str, provider: MetricsProvider) -> None:
+    logger.debug(f"Registering metrics provider {name}")
+    _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: provider() for name, provider in _providers.items()}
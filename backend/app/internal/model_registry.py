@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from app.internal.config import config
+from app.internal.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelState:
+    name: str
+    state: str = "pending"
+    load_ms: Optional[float] = None
+    warmup_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ModelRegistry:
+    def __init__(self, eager: bool):
+        self.eager = eager
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmups: Dict[str, Callable[[], Any]] = {}
+        self._states: Dict[str, ModelState] = {}
+
+    def register(
+        self, name: str, load: Callable[[], Any], warmup: Callable[[], Any]
+    ) -> None:
+        self._loaders[name] = load
+        self._warmups[name] = warmup
+        self._states[name] = ModelState(name=name)
+
+    async def load_all(self) -> None:
+        logger.info(f"Loading models {', '.join(self._loaders)}")
+        await asyncio.gather(*(self._load(name) for name in self._loaders))
+
+    async def _load(self, name: str) -> None:
+        state = self._states[name]
+        state.state = "loading"
+
+        try:
+            started = time.perf_counter()
+            await asyncio.to_thread(self._loaders[name])
+            state.load_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            await asyncio.to_thread(self._warmups[name])
+            state.warmup_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            logger.exception(f"Failed to load model {name}")
+            state.state = "failed"
+            state.error = str(e)
+            return
+
+        state.state = "ready"
+        logger.info(
+            f"Model {name} ready: loaded in {state.load_ms:.0f} ms, "
+            f"warmed up in {state.warmup_ms:.0f} ms"
+        )
+
+    def states(self) -> List[ModelState]:
+        return list(self._states.values())
+
+    def failed(self) -> bool:
+        return any(s.state == "failed" for s in self._states.values())
+
+    def ready(self) -> bool:
+        # Lazily loaded models are loaded by the first request that needs them
+        if not self.eager:
+            return True
+        return all(s.state == "ready" for s in self._states.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {s.name: asdict(s) for s in self._states.values()}
+
+
+@lru_cache()
+def get_model_registry() -> ModelRegistry:
+    registry = ModelRegistry(eager=config.EAGER_MODEL_LOADING)
+    register_metrics("models", registry.stats)
+    return registry
@@ -1,9 +1,72 @@
-import redis
+import logging
+from typing import Any, Dict, Optional
+
+import redis.asyncio as redis
 from app.internal.config import config
+from app.internal.metrics import register_metrics
 
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+
+    async def get_connection(self, *args: Any, **kwargs: Any):
+        self.waiting += 1
+        try:
+            return await super().get_connection(*args, **kwargs)
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "available": len(self._available_connections),
+            "waiting": self.waiting,
+        }
+
+
+_redis_client: Optional[redis.Redis] = None
 
-def get_redis_client() -> redis.Redis:
-    return redis.from_url(config.REDIS_URL, decode_responses=False)
 
+def create_redis_pool() -> InstrumentedConnectionPool:
+    return InstrumentedConnectionPool.from_url(
+        config.REDIS_URL,
+        max_connections=config.REDIS_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT,
+        socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=config.REDIS_SOCKET_TIMEOUT,
+        health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=False,
+    )
 
-redis_client = get_redis_client()
+
+async def init_redis() -> redis.Redis:
+    global _redis_client
+
+    logger.info(
+        f"Creating Redis connection pool with max {config.REDIS_MAX_CONNECTIONS} "
+        "connections"
+    )
+    pool = create_redis_pool()
+    _redis_client = redis.Redis(connection_pool=pool)
+    register_metrics("redis_pool", pool.stats)
+    return _redis_client
+
+
+async def close_redis() -> None:
+    global _redis_client
+
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        await _redis_client.connection_pool.disconnect()
+        _redis_client = None
+
+
+def get_redis_client() -> redis.Redis:
+    if _redis_client is None:
+        raise RuntimeError("Redis client is not initialised, call init_redis() first")
+    return _redis_client
@@ -1,22 +1,55 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from asgi_correlation_id import CorrelationIdMiddleware
 from fastapi import FastAPI, HTTPException
 from fastapi.exception_handlers import http_exception_handler
 
+from app.internal.cpu import apply_cpu_settings
+from app.internal.executor import get_inference_executor
 from app.internal.logging import configure_logging
+from app.internal.model_registry import get_model_registry
+from app.internal.redis import close_redis, init_redis
 from app.routers.ask import router as ask_router
+from app.routers.health import router as health_router
+from app.routers.metrics import router as metrics_router
+from app.routers.sessions import router as sessions_router
 from app.routers.upload import router as upload_router
+from app.services.extraction import shutdown_extraction_pool
 
 logger = logging.getLogger(__name__)
 
 configure_logging()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Thread counts have to be in place before torch, faiss or tokenizers load
+    apply_cpu_settings()
+    await init_redis()
+
+    # Loads in the background so /healthz answers while models warm up
+    registry = get_model_registry()
+    loading = asyncio.create_task(registry.load_all()) if registry.eager else None
+
+    yield
+
+    if loading is not None:
+        loading.cancel()
+    await close_redis()
+    get_inference_executor().shutdown()
+    shutdown_extraction_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(CorrelationIdMiddleware)
 
 app.include_router(upload_router)
 app.include_router(ask_router)
+app.include_router(sessions_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 
 @app.exception_handler(HTTPException)
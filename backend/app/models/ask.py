@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Entity(BaseModel):
@@ -13,6 +13,24 @@ class Entity(BaseModel):
 
 class AskRequest(BaseModel):
     question: str
+    include_entities: bool = True
+
+
+class AskBatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1)
+    include_entities: bool = True
+
+
+class AnswerTimings(BaseModel):
+    tokenize_ms: float
+    forward_ms: float
+    postprocess_ms: float
+    windows: int
+    windows_total: int
+    early_exit: bool
+    windows_cached: bool
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SingleModelAnswer(BaseModel):
@@ -21,6 +39,7 @@ class SingleModelAnswer(BaseModel):
     answer: str
     score: float
     entities: Optional[List[Entity]]
+    timings: Optional[AnswerTimings] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -29,3 +48,9 @@ class MultiAskResponse(BaseModel):
     results: List[SingleModelAnswer]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class BatchAskResponse(BaseModel):
+    results: List[MultiAskResponse]
+
+    model_config = ConfigDict(from_attributes=True)
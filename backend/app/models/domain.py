@@ -1,8 +1,9 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
 class DocumentSession:
     session_id: str
     page_texts: List[str]
+    content_id: Optional[str] = None
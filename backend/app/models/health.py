@@ -0,0 +1,20 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ModelStatus(BaseModel):
+    name: str
+    state: Literal["pending", "loading", "ready", "failed"]
+    load_ms: Optional[float] = None
+    warmup_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class HealthResponse(BaseModel):
+    status: Literal["ok", "loading", "failed"]
+    models: List[ModelStatus]
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,16 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SessionStatusResponse(BaseModel):
+    session_id: str
+    state: Literal["pending", "running", "ready", "failed"]
+    pages_extracted: int
+    chunks_total: Optional[int] = None
+    chunks_embedded: int = 0
+    error: Optional[str] = None
+    embeddings_dtype: Optional[str] = None
+    embeddings_bytes: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
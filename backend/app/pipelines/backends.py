@@ -0,0 +1,133 @@
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from app.internal.config import config
+from app.internal.cpu import get_cpu_settings, import_torch
+
+logger = logging.getLogger(__name__)
+
+TORCH = "torch"
+ONNX = "onnx"
+ONNX_INT8 = "onnx-int8"
+
+# transformers auto class and its ONNX Runtime counterpart in optimum
+MODEL_CLASSES = {
+    "question-answering": (
+        "AutoModelForQuestionAnswering",
+        "ORTModelForQuestionAnswering",
+    ),
+    "token-classification": (
+        "AutoModelForTokenClassification",
+        "ORTModelForTokenClassification",
+    ),
+}
+
+QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def resolve_backend(override: Optional[str]) -> str:
+    return override or config.INFERENCE_BACKEND
+
+
+def export_dir(model_name: str, backend: str) -> Path:
+    return Path(config.ONNX_CACHE_DIR) / model_name.replace("/", "--") / backend
+
+
+def _import_optimum():
+    try:
+        import optimum.onnxruntime as ort
+    except ImportError as e:
+        raise RuntimeError(
+            "The onnx backends need optimum[onnxruntime], "
+            "install it with pip install -r requirements-onnx.txt"
+        ) from e
+    return ort
+
+
+def _export_onnx(ort_class: Any, model_name: str, backend: str) -> Path:
+    fp32_dir = export_dir(model_name, ONNX)
+    if not (fp32_dir / "model.onnx").exists():
+        logger.info(f"Exporting {model_name} to ONNX in {fp32_dir}")
+        ort_class.from_pretrained(model_name, export=True).save_pretrained(fp32_dir)
+
+    if backend == ONNX:
+        return fp32_dir
+
+    int8_dir = export_dir(model_name, ONNX_INT8)
+    if not (int8_dir / QUANTIZED_FILE).exists():
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        logger.info(f"Quantizing {model_name} to int8 in {int8_dir}")
+        quantizer = _import_optimum().ORTQuantizer.from_pretrained(fp32_dir)
+        quantizer.quantize(
+            save_dir=int8_dir,
+            quantization_config=AutoQuantizationConfig.avx2(
+                is_static=False, per_channel=False
+            ),
+        )
+    return int8_dir
+
+
+def load_transformers_model(task: str, model_name: str, backend: str) -> Any:
+    auto_class, ort_class = MODEL_CLASSES[task]
+    logger.info(f"Loading {task} model {model_name} with the {backend} backend")
+
+    import_torch()
+    if backend == TORCH:
+        import transformers
+
+        model = getattr(transformers, auto_class).from_pretrained(model_name)
+        model.eval()
+        return model
+
+    cls = getattr(_import_optimum(), ort_class)
+    path = _export_onnx(cls, model_name, backend)
+    file_name = QUANTIZED_FILE if backend == ONNX_INT8 else "model.onnx"
+    return cls.from_pretrained(
+        path, file_name=file_name, session_options=_session_options()
+    )
+
+
+def _session_options() -> Any:
+    import onnxruntime
+
+    settings = get_cpu_settings()
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = settings.intra_op_threads
+    options.inter_op_num_threads = settings.inter_op_threads
+    return options
+
+
+def load_sentence_transformer(model_name: str, backend: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    import_torch()
+
+    logger.info(f"Loading embedding model {model_name} with the {backend} backend")
+    if backend == TORCH:
+        return SentenceTransformer(model_name)
+
+    _import_optimum()
+    path = export_dir(model_name, backend)
+    if not (path / "onnx" / "model.onnx").exists():
+        logger.info(f"Exporting {model_name} to ONNX in {path}")
+        SentenceTransformer(model_name, backend="onnx").save(str(path))
+
+    if backend == ONNX:
+        return SentenceTransformer(str(path), backend="onnx")
+
+    quantized = sorted(path.glob("onnx/model_*int8_avx2.onnx"))
+    if not quantized:
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        logger.info(f"Quantizing {model_name} to int8 in {path}")
+        model = SentenceTransformer(str(path), backend="onnx")
+        export_dynamic_quantized_onnx_model(model, "avx2", str(path))
+        quantized = sorted(path.glob("onnx/model_*int8_avx2.onnx"))
+
+    return SentenceTransformer(
+        str(path),
+        backend="onnx",
+        model_kwargs={"file_name": str(quantized[0].relative_to(path))},
+    )
@@ -0,0 +1,159 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from transformers import PreTrainedTokenizerBase
+
+PAGE_SEPARATOR = "\n\n"
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n+")
+
+
+@dataclass
+class Chunk:
+    text: str
+    page_start: int
+    page_end: int
+    char_start: int
+    char_end: int
+    tokens: int
+
+    def metadata(self) -> Dict[str, int]:
+        return {name: value for name, value in asdict(self).items() if name != "text"}
+
+
+@dataclass
+class _Span:
+    page: int
+    # (start, end) of every token, as offsets into the document text
+    offsets: List[Tuple[int, int]]
+
+    @property
+    def start(self) -> int:
+        return self.offsets[0][0]
+
+    @property
+    def end(self) -> int:
+        return self.offsets[-1][1]
+
+    @property
+    def tokens(self) -> int:
+        return len(self.offsets)
+
+
+def document_text(pages: List[str]) -> str:
+    return PAGE_SEPARATOR.join(pages)
+
+
+def split_paragraphs(pages: List[str]) -> List[Tuple[int, int, int]]:
+    # (page, start, end) per non-blank paragraph, offsets into document_text(pages)
+    paragraphs = []
+    offset = 0
+    for page, text in enumerate(pages):
+        bounds = [0]
+        for match in _PARAGRAPH_BREAK.finditer(text):
+            bounds += [match.start(), match.end()]
+        bounds.append(len(text))
+
+        for start, end in zip(bounds[::2], bounds[1::2]):
+            piece = text[start:end]
+            if piece.strip():
+                lead = len(piece) - len(piece.lstrip())
+                paragraphs.append(
+                    (page, offset + start + lead, offset + start + len(piece.rstrip()))
+                )
+        offset += len(text) + len(PAGE_SEPARATOR)
+    return paragraphs
+
+
+def _split_long(
+    page: int, offsets: List[Tuple[int, int]], max_tokens: int, overlap_tokens: int
+) -> List[_Span]:
+    if len(offsets) <= max_tokens:
+        return [_Span(page, offsets)]
+
+    # Paragraphs over the budget become overlapping token windows
+    spans = []
+    step = max_tokens - overlap_tokens
+    for first in range(0, len(offsets), step):
+        spans.append(_Span(page, offsets[first : first + max_tokens]))
+        if first + max_tokens >= len(offsets):
+            break
+    return spans
+
+
+def _make_chunk(text: str, spans: List[_Span]) -> Chunk:
+    start, end = spans[0].start, spans[-1].end
+    return Chunk(
+        text=text[start:end],
+        page_start=spans[0].page,
+        page_end=spans[-1].page,
+        char_start=start,
+        char_end=end,
+        tokens=sum(span.tokens for span in spans),
+    )
+
+
+def _overlap_tail(spans: List[_Span], overlap_tokens: int, before: int) -> List[_Span]:
+    # The last overlap_tokens tokens ahead of before, cut mid-paragraph if need be
+    tail: List[_Span] = []
+    remaining = overlap_tokens
+    for span in reversed(spans):
+        if remaining <= 0:
+            break
+        offsets = [o for o in span.offsets if o[0] < before][-remaining:]
+        if offsets:
+            tail.insert(0, _Span(span.page, offsets))
+            remaining -= len(offsets)
+    return tail
+
+
+def chunk_document(
+    pages: List[str],
+    tokenizer: "PreTrainedTokenizerBase",
+    max_tokens: int,
+    overlap_tokens: int = 0,
+) -> List[Chunk]:
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError(
+            f"Chunk overlap of {overlap_tokens} tokens must be below {max_tokens}"
+        )
+
+    text = document_text(pages)
+    paragraphs = split_paragraphs(pages)
+    if not paragraphs:
+        return []
+
+    enc = tokenizer(
+        [text[start:end] for _, start, end in paragraphs],
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False,
+    )
+    spans = []
+    for (page, start, _), offsets in zip(paragraphs, enc["offset_mapping"]):
+        # Paragraphs of only characters the tokenizer drops have nothing to embed
+        if offsets:
+            absolute = [(start + s, start + e) for s, e in offsets]
+            spans += _split_long(page, absolute, max_tokens, overlap_tokens)
+
+    # Greedily pack consecutive paragraphs up to the budget, and start each
+    # chunk with the last overlap_tokens tokens of the previous one
+    chunks: List[Chunk] = []
+    current: List[_Span] = []
+    tokens = 0
+    for span in spans:
+        if current and tokens + span.tokens > max_tokens:
+            chunks.append(_make_chunk(text, current))
+            # Windows of one long paragraph already start with their overlap
+            repeated = sum(o[0] >= span.start for s in current for o in s.offsets)
+            overlap = min(overlap_tokens - repeated, max_tokens - span.tokens)
+            current = _overlap_tail(current, overlap, before=span.start)
+            tokens = sum(s.tokens for s in current)
+        current.append(span)
+        tokens += span.tokens
+
+    if current:
+        chunks.append(_make_chunk(text, current))
+    return chunks
@@ -1,33 +1,53 @@
 import logging
 from functools import lru_cache
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, Dict, List
 
 from pydantic import ValidationError
-from transformers import Pipeline, pipeline
 
+from app.internal.cache import TTLCache
+from app.internal.config import config
+from app.internal.metrics import register_metrics
+from app.internal.model_registry import get_model_registry
 from app.models.ask import Entity
+from app.pipelines.backends import load_transformers_model, resolve_backend
+
+if TYPE_CHECKING:
+    from transformers import Pipeline
 
 logger = logging.getLogger(__name__)
 
-MODEL_NAME = "dslim/bert-large-NER"
+MODEL_NAME = config.NER_MODEL_NAME
+
+_ENTITY_CACHE: TTLCache[List[Entity]] = TTLCache(maxsize=config.NER_CACHE_SIZE)
+register_metrics("ner_cache", _ENTITY_CACHE.stats)
 
 
 @lru_cache()
-def get_ner_pipeline() -> Pipeline:
+def get_ner_pipeline() -> "Pipeline":
+    from transformers import AutoTokenizer, pipeline
+
     logger.info(f"Loading NER model: {MODEL_NAME}")
 
+    model = load_transformers_model(
+        "token-classification", MODEL_NAME, resolve_backend(config.NER_BACKEND)
+    )
     return pipeline(
         task="ner",
-        model=MODEL_NAME,
-        tokenizer=MODEL_NAME,
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(MODEL_NAME),
         aggregation_strategy="simple",
     )
 
 
-def extract_entities(text: str) -> List[Entity]:
-    ner = get_ner_pipeline()
-    raw_predictions: List[dict[str, Any]] = ner(text)
+# Calls the pipeline directly so the warmup text is not memoized
+get_model_registry().register(
+    "ner",
+    load=get_ner_pipeline,
+    warmup=lambda: get_ner_pipeline()(["Warmup in Paris."], batch_size=1),
+)
+
 
+def to_entities(raw_predictions: List[Dict[str, Any]]) -> List[Entity]:
     entities: List[Entity] = []
     for item in raw_predictions:
         data = {
@@ -43,3 +63,27 @@ def extract_entities(text: str) -> List[Entity]:
             continue
 
     return entities
+
+
+def extract_entities(texts: List[str]) -> List[List[Entity]]:
+    # Empty answers never reach the model
+    results: Dict[str, List[Entity]] = {"": []}
+    pending: List[str] = []
+    for text in texts:
+        if text in results:
+            continue
+        cached = _ENTITY_CACHE.get(text)
+        if cached is not None:
+            results[text] = cached
+        else:
+            results[text] = []
+            pending.append(text)
+
+    if pending:
+        ner = get_ner_pipeline()
+        raw = ner(pending, batch_size=len(pending))
+        for text, predictions in zip(pending, raw):
+            results[text] = to_entities(predictions)
+            _ENTITY_CACHE.set(text, results[text])
+
+    return [results[text] for text in texts]
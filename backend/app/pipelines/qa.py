@@ -1,45 +1,131 @@
+import copy
 import logging
+import time
 from functools import lru_cache
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
-from transformers import Pipeline, pipeline
+from app.internal.batching import MicroBatcher
+from app.internal.cache import TTLCache
+from app.internal.config import config
+from app.internal.executor import get_inference_executor
+from app.internal.metrics import register_metrics
+from app.pipelines.qa_engine import (
+    MODEL_NAME,
+    DocumentWindows,
+    QATimings,
+    answer_full_context,
+    answer_questions,
+    get_qa_model,
+    tokenize_document,
+)
+from app.services.session import SESSION_TTL, get_document_pages, resolve_content_id
 
-from app.services.session import get_session_text
+if TYPE_CHECKING:
+    from transformers import Pipeline
 
 logger = logging.getLogger(__name__)
 
-MODEL_NAME = "distilbert-base-uncased-distilled-squad"
+_WINDOW_CACHE: TTLCache[DocumentWindows] = TTLCache(
+    maxsize=config.QA_WINDOW_CACHE_SIZE, ttl=SESSION_TTL
+)
+register_metrics("qa_window_cache", _WINDOW_CACHE.stats)
 
 
+# Shares the full-context engine's weights, so the model is loaded and warmed
+# once per process. The tokenizer is a copy, as the pipeline truncates
+# differently from the engine (see qa_engine.get_qa_tokenizer)
 @lru_cache()
-def get_qa_pipeline() -> Pipeline:
-    logger.info(f"Loading QA model {MODEL_NAME}")
+def get_qa_pipeline() -> "Pipeline":
+    from transformers import pipeline
 
-    return pipeline("question-answering", model=MODEL_NAME, tokenizer=MODEL_NAME)
+    logger.info(f"Building QA pipeline over {MODEL_NAME}")
+
+    tokenizer, model = get_qa_model()
+    return pipeline(
+        "question-answering", model=model, tokenizer=copy.deepcopy(tokenizer)
+    )
 
 
-def run_qa_model(question: str, contexts: List[str]) -> Tuple[str, float]:
+def run_qa_batch(items: List[Tuple[str, str]]) -> List[Tuple[str, float]]:
     qa = get_qa_pipeline()
-    context = "\n\n".join(contexts)
+    questions = [question for question, _ in items]
+    contexts = [context for _, context in items]
 
     try:
-        out = qa(question=question, context=context)
-        answer = out.get("answer", "").strip()
-        score = float(out.get("score", 0.0))
-
-        return answer, score
+        out = qa(question=questions, context=contexts, batch_size=len(items))
     except Exception:
         logger.exception("QA pipeline inference failed")
 
         raise
 
+    if isinstance(out, dict):
+        out = [out]
+
+    return [(o.get("answer", "").strip(), float(o.get("score", 0.0))) for o in out]
+
+
+@lru_cache()
+def get_qa_batcher() -> MicroBatcher[Tuple[str, str], Tuple[str, float]]:
+    batcher = MicroBatcher(
+        name="qa",
+        fn=run_qa_batch,
+        max_batch_size=config.QA_BATCH_MAX_SIZE,
+        max_wait_ms=config.QA_BATCH_MAX_WAIT_MS,
+    )
+    register_metrics("qa_batcher", batcher.stats.as_dict)
+    return batcher
+
+
+async def run_qa_model(question: str, contexts: List[str]) -> Tuple[str, float]:
+    context = "\n\n".join(contexts)
+
+    return await get_qa_batcher().submit((question, context))
+
+
+async def get_document_windows(content_id: str) -> Tuple[DocumentWindows, bool]:
+    windows = _WINDOW_CACHE.get(content_id)
+    if windows is not None:
+        return windows, True
+
+    context = "\n\n".join(await get_document_pages(content_id))
+    windows = await get_inference_executor().run(tokenize_document, context)
+    _WINDOW_CACHE.set(content_id, windows)
+    return windows, False
+
+
+async def run_qa_pipeline(
+    session_id: str, question: str
+) -> Tuple[str, float, QATimings]:
+    content_id = await resolve_content_id(session_id)
 
-def run_qa_pipeline(session_id: str, question: str) -> Tuple[str, float]:
-    page_texts = get_session_text(session_id).page_texts
+    started = time.perf_counter()
+    windows, cached = await get_document_windows(content_id)
+    tokenize_ms = (time.perf_counter() - started) * 1000
 
-    answer, score = run_qa_model(question, page_texts)
+    answer, score, timings = await get_inference_executor().run(
+        answer_full_context, question, windows
+    )
+    timings.tokenize_ms += tokenize_ms
+    timings.windows_cached = cached
     logger.info(
         f"QA pipeline complete for session {session_id}. "
-        f"Answer: {answer}, Score: {score}"
+        f"Answer: {answer}, Score: {score}, Timings: {timings}"
+    )
+    return answer, score, timings
+
+
+async def run_qa_questions(
+    content_id: str, questions: List[str]
+) -> List[Tuple[str, float, QATimings]]:
+    started = time.perf_counter()
+    windows, cached = await get_document_windows(content_id)
+    tokenize_ms = (time.perf_counter() - started) * 1000
+
+    results = await get_inference_executor().run(answer_questions, questions, windows)
+    for _, _, timings in results:
+        timings.tokenize_ms += tokenize_ms
+        timings.windows_cached = cached
+    logger.info(
+        f"QA pipeline answered {len(questions)} questions for document {content_id}"
     )
-    return answer, score
+    return results
@@ -0,0 +1,276 @@
+import copy
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+
+from app.internal.config import config
+from app.internal.cpu import import_torch
+from app.internal.model_registry import get_model_registry
+from app.pipelines.backends import load_transformers_model, resolve_backend
+
+if TYPE_CHECKING:
+    from transformers import PreTrainedModel, PreTrainedTokenizerFast
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "distilbert-base-uncased-distilled-squad"
+
+_THREAD_TOKENIZER = threading.local()
+
+
+@dataclass
+class QATimings:
+    tokenize_ms: float = 0.0
+    forward_ms: float = 0.0
+    postprocess_ms: float = 0.0
+    windows: int = 0
+    windows_total: int = 0
+    early_exit: bool = False
+    windows_cached: bool = False
+
+
+@dataclass
+class DocumentWindows:
+    context: str
+    ids: np.ndarray
+    offsets: np.ndarray
+    lengths: np.ndarray
+    windows_total: int
+
+
+@lru_cache()
+def get_qa_model() -> Tuple["PreTrainedTokenizerFast", "PreTrainedModel"]:
+    from transformers import AutoTokenizer
+
+    logger.info(f"Loading full-context QA model {MODEL_NAME}")
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = load_transformers_model(
+        "question-answering", MODEL_NAME, resolve_backend(config.QA_BACKEND)
+    )
+    return tokenizer, model
+
+
+def get_qa_tokenizer() -> "PreTrainedTokenizerFast":
+    # A call with other truncation settings than the last one borrows the Rust
+    # tokenizer mutably and fails while another thread encodes, so every
+    # inference thread tokenizes with its own copy
+    shared, _ = get_qa_model()
+    if getattr(_THREAD_TOKENIZER, "source", None) is not shared:
+        _THREAD_TOKENIZER.source = shared
+        _THREAD_TOKENIZER.tokenizer = copy.deepcopy(shared)
+    return _THREAD_TOKENIZER.tokenizer
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+def best_span(
+    start_logits: np.ndarray,
+    end_logits: np.ndarray,
+    context_mask: np.ndarray,
+    max_answer_len: int,
+) -> Tuple[int, int, float]:
+    start = _softmax(np.where(context_mask, start_logits, -np.inf))
+    end = _softmax(np.where(context_mask, end_logits, -np.inf))
+
+    # Spans must end after they start and stay within max_answer_len tokens
+    scores = np.tril(np.triu(np.outer(start, end)), max_answer_len - 1)
+    s, e = np.unravel_index(np.argmax(scores), scores.shape)
+    return int(s), int(e), float(scores[s, e])
+
+
+def _elapsed_ms(since: float) -> float:
+    return (time.perf_counter() - since) * 1000
+
+
+def window_tokens() -> int:
+    # Room left for [CLS] question [SEP] ... [SEP] at the longest question
+    return config.QA_WINDOW_SIZE - config.QA_MAX_QUESTION_TOKENS - 3
+
+
+def tokenize_document(context: str) -> DocumentWindows:
+    tokenizer = get_qa_tokenizer()
+    size = window_tokens()
+    step = size - config.QA_WINDOW_STRIDE
+
+    enc = tokenizer(
+        context,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False,
+    )
+    ids = np.asarray(enc["input_ids"], dtype=np.int64)
+    offsets = np.asarray(enc["offset_mapping"], dtype=np.int64).reshape(-1, 2)
+
+    starts = [0]
+    while starts[-1] + size < len(ids):
+        starts.append(starts[-1] + step)
+    if not len(ids):
+        starts = []
+
+    kept = starts[: config.QA_MAX_WINDOWS]
+    windows = DocumentWindows(
+        context=context,
+        ids=np.full((len(kept), size), tokenizer.pad_token_id, dtype=np.int64),
+        offsets=np.zeros((len(kept), size, 2), dtype=np.int64),
+        lengths=np.zeros(len(kept), dtype=np.int64),
+        windows_total=len(starts),
+    )
+    for w, start in enumerate(kept):
+        n = min(size, len(ids) - start)
+        windows.ids[w, :n] = ids[start : start + n]
+        windows.offsets[w, :n] = offsets[start : start + n]
+        windows.lengths[w] = n
+
+    if len(kept) < len(starts):
+        logger.info(
+            f"Context needs {len(starts)} windows, only the first {len(kept)} are kept"
+        )
+    return windows
+
+
+def splice_questions(
+    question_ids: List[List[int]],
+    windows: DocumentWindows,
+    rows: List[Tuple[int, int]],
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    tokenizer, _ = get_qa_model()
+    prefixes = [
+        [tokenizer.cls_token_id, *ids, tokenizer.sep_token_id] for ids in question_ids
+    ]
+    firsts = np.array([len(prefixes[q]) for q, _ in rows], dtype=np.int64)
+    lengths = windows.lengths[[w for _, w in rows]]
+    size = windows.ids.shape[1]
+
+    # Each row is [CLS] question [SEP] window [SEP] for one (question, window) pair
+    input_ids = np.full(
+        (len(rows), firsts.max() + size + 1), tokenizer.pad_token_id, np.int64
+    )
+    for i, (q, w) in enumerate(rows):
+        input_ids[i, : firsts[i]] = prefixes[q]
+        input_ids[i, firsts[i] : firsts[i] + size] = windows.ids[w]
+    input_ids[np.arange(len(rows)), firsts + lengths] = tokenizer.sep_token_id
+
+    positions = np.arange(input_ids.shape[1])
+    inputs = {
+        "input_ids": input_ids,
+        "attention_mask": (positions < (firsts + lengths + 1)[:, None]).astype(
+            np.int64
+        ),
+        "token_type_ids": (positions >= firsts[:, None]).astype(np.int64),
+    }
+    return {name: inputs[name] for name in tokenizer.model_input_names}, firsts
+
+
+def splice_question(
+    question_ids: List[int], windows: DocumentWindows, start: int, end: int
+) -> Tuple[Dict[str, np.ndarray], int]:
+    inputs, firsts = splice_questions(
+        [question_ids], windows, [(0, w) for w in range(start, end)]
+    )
+    return inputs, int(firsts[0])
+
+
+def answer_questions(
+    questions: List[str], windows: DocumentWindows
+) -> List[Tuple[str, float, QATimings]]:
+    torch = import_torch()
+
+    _, model = get_qa_model()
+    tokenizer = get_qa_tokenizer()
+    timings = [QATimings(windows_total=windows.windows_total) for _ in questions]
+    answers = [""] * len(questions)
+    scores = [0.0] * len(questions)
+    total = len(windows.lengths)
+    if not total or not questions:
+        return list(zip(answers, scores, timings))
+
+    # Shared steps count in full towards every question they served
+    started = time.perf_counter()
+    question_ids = tokenizer(
+        list(questions),
+        add_special_tokens=False,
+        truncation=True,
+        max_length=config.QA_MAX_QUESTION_TOKENS,
+    )["input_ids"]
+    for t in timings:
+        t.tokenize_ms = _elapsed_ms(started)
+
+    # Window-major order, so every question sees its windows front to back
+    order = [(q, w) for w in range(total) for q in range(len(questions))]
+    exited, pos = set(), 0
+    while True:
+        rows = []
+        while pos < len(order) and len(rows) < config.QA_WINDOW_BATCH_SIZE:
+            if order[pos][0] not in exited:
+                rows.append(order[pos])
+            pos += 1
+        if not rows:
+            break
+        asked = sorted({q for q, _ in rows})
+
+        started = time.perf_counter()
+        inputs, firsts = splice_questions(question_ids, windows, rows)
+        for q in asked:
+            timings[q].tokenize_ms += _elapsed_ms(started)
+
+        started = time.perf_counter()
+        with torch.inference_mode():
+            out = model(**{name: torch.from_numpy(v) for name, v in inputs.items()})
+        start_logits = out.start_logits.numpy()
+        end_logits = out.end_logits.numpy()
+        for q in asked:
+            timings[q].forward_ms += _elapsed_ms(started)
+
+        started = time.perf_counter()
+        positions = np.arange(start_logits.shape[1])
+        for i, (q, w) in enumerate(rows):
+            first = firsts[i]
+            mask = (positions >= first) & (positions < first + windows.lengths[w])
+            s, e, score = best_span(
+                start_logits[i], end_logits[i], mask, config.QA_MAX_ANSWER_TOKENS
+            )
+            timings[q].windows += 1
+            if score > scores[q]:
+                scores[q] = score
+                span_start = windows.offsets[w, s - first, 0]
+                span_end = windows.offsets[w, e - first, 1]
+                answers[q] = windows.context[span_start:span_end].strip()
+        for q in asked:
+            timings[q].postprocess_ms += _elapsed_ms(started)
+
+        threshold = config.QA_EARLY_EXIT_SCORE
+        for q in asked:
+            if threshold is None or scores[q] < threshold:
+                continue
+            if timings[q].windows < total:
+                logger.info(
+                    f"Early exit after {timings[q].windows}/{total} windows, "
+                    f"score {scores[q]}"
+                )
+                timings[q].early_exit = True
+            exited.add(q)
+
+    return list(zip(answers, scores, timings))
+
+
+def answer_full_context(
+    question: str, windows: DocumentWindows
+) -> Tuple[str, float, QATimings]:
+    return answer_questions([question], windows)[0]
+
+
+def warmup_qa_engine() -> None:
+    windows = tokenize_document("This is a warmup document.")
+    answer_full_context("What is this?", windows)
+
+
+get_model_registry().register("qa_engine", load=get_qa_model, warmup=warmup_qa_engine)
@@ -1,75 +1,479 @@
+import asyncio
+import copy
 import logging
-import re
-from typing import List, Tuple
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import faiss
 import numpy as np
 from fastapi import HTTPException, status
-from sentence_transformers import SentenceTransformer
 
+from app.internal.batching import MicroBatcher
+from app.internal.cache import TTLCache
+from app.internal.config import config
+from app.internal.cpu import import_faiss
+from app.internal.executor import get_inference_executor
+from app.internal.metrics import register_metrics
+from app.internal.model_registry import get_model_registry
+from app.pipelines.backends import load_sentence_transformer, resolve_backend
+from app.pipelines.chunking import Chunk, chunk_document
 from app.pipelines.qa import run_qa_model
+from app.services.index_format import decode_index, encode_index, is_encoded_index
 from app.services.session import (
+    SESSION_TTL,
     cache_chunks_and_embeddings,
-    get_session_text,
+    cache_faiss_index,
+    get_document_pages,
     has_cached_embeddings,
+    load_cached_chunk_map,
     load_cached_chunks,
     load_cached_embeddings,
+    load_cached_index,
+    resolve_content_id,
+    update_index_status,
 )
+from app.services.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+    from transformers import PreTrainedTokenizerBase
 
 logger = logging.getLogger(__name__)
 
 
 MODEL_NAME = "all-MiniLM-L6-v2"
-_EMBEDDER = SentenceTransformer(MODEL_NAME)
-EMBED_DIM = _EMBEDDER.get_sentence_embedding_dimension()
 
+_INDEX_CACHE: TTLCache["faiss.Index"] = TTLCache(
+    maxsize=config.FAISS_INDEX_CACHE_SIZE, ttl=SESSION_TTL
+)
+register_metrics("faiss_index_cache", _INDEX_CACHE.stats)
 
-def chunk_paragraphs(text: List[str]) -> List[str]:
-    full_text = "\n\n".join(text)
-    paras = [para.strip() for para in re.split(r"\n\s*\n+", full_text) if para.strip()]
-    return paras
+_QUERY_CACHE: TTLCache[np.ndarray] = TTLCache(maxsize=config.EMBED_QUERY_CACHE_SIZE)
+register_metrics("query_embedding_cache", _QUERY_CACHE.stats)
 
+_INDEXING = SingleFlight(
+    "indexing",
+    lease=config.INDEX_LOCK_LEASE,
+    poll_interval=config.INDEX_LOCK_POLL_INTERVAL,
+)
 
-def embed_chunks(chunks: List[str]) -> np.ndarray:
-    return _EMBEDDER.encode(
-        chunks,
+
+@lru_cache()
+def get_embedder() -> "SentenceTransformer":
+    return load_sentence_transformer(MODEL_NAME, resolve_backend(config.EMBED_BACKEND))
+
+
+def embed_dim() -> int:
+    return get_embedder().get_sentence_embedding_dimension()
+
+
+# A copy, as chunking encodes without truncation while query embedding
+# truncates, and the fast tokenizer fails ("Already borrowed") when another
+# thread switches its truncation settings mid-call
+@lru_cache()
+def get_chunk_tokenizer() -> "PreTrainedTokenizerBase":
+    return copy.deepcopy(get_embedder().tokenizer)
+
+
+def chunk_token_budget() -> int:
+    # Room for [CLS] and [SEP] within the embedder's sequence length
+    return config.CHUNK_MAX_TOKENS or get_embedder().max_seq_length - 2
+
+
+def chunk_pages(pages: List[str]) -> List[Chunk]:
+    return chunk_document(
+        pages,
+        get_chunk_tokenizer(),
+        max_tokens=chunk_token_budget(),
+        overlap_tokens=config.CHUNK_OVERLAP_TOKENS,
+    )
+
+
+class EncodeStats:
+    def __init__(self):
+        self.sentences: Dict[str, int] = {"chunk": 0, "query": 0}
+        self.seconds: Dict[str, float] = {"chunk": 0.0, "query": 0.0}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, sentences: int, seconds: float) -> None:
+        with self._lock:
+            self.sentences[kind] += sentences
+            self.seconds[kind] += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            kind: {
+                "sentences": self.sentences[kind],
+                "seconds": self.seconds[kind],
+                "sentences_per_s": (
+                    self.sentences[kind] / self.seconds[kind]
+                    if self.seconds[kind]
+                    else 0.0
+                ),
+            }
+            for kind in self.sentences
+        }
+
+
+_ENCODE_STATS = EncodeStats()
+register_metrics("embedder", _ENCODE_STATS.as_dict)
+
+
+# MiniLM is trained for cosine similarity, so vectors are unit length and
+# searched by inner product
+def _encode(kind: str, texts: List[str], batch_size: int) -> np.ndarray:
+    started = time.perf_counter()
+    embeddings = get_embedder().encode(
+        texts,
+        batch_size=batch_size,
         convert_to_numpy=True,
+        normalize_embeddings=True,
         show_progress_bar=False,
     )
+    _ENCODE_STATS.record(kind, len(texts), time.perf_counter() - started)
+    return embeddings
+
+
+def embed_chunks(chunks: List[str]) -> np.ndarray:
+    return _encode("chunk", chunks, config.EMBED_ENCODE_BATCH_SIZE)
+
+
+def embed_questions(questions: List[str]) -> np.ndarray:
+    return _encode("query", questions, len(questions))
+
+
+def embed_question(question: str) -> np.ndarray:
+    return embed_questions([question])
+
+
+get_model_registry().register(
+    "embedder", load=get_embedder, warmup=lambda: embed_question("warmup")
+)
+
+
+def normalize_query(question: str) -> str:
+    # The MiniLM tokenizer is uncased and splits on whitespace, so this does
+    # not change the embedding
+    return " ".join(question.lower().split())
+
+
+def encode_query_batch(questions: List[str]) -> List[np.ndarray]:
+    return list(embed_questions(questions))
+
+
+@lru_cache()
+def get_query_batcher() -> MicroBatcher[str, np.ndarray]:
+    batcher = MicroBatcher(
+        name="embed_query",
+        fn=encode_query_batch,
+        max_batch_size=config.EMBED_QUERY_BATCH_MAX_SIZE,
+        max_wait_ms=config.EMBED_QUERY_BATCH_MAX_WAIT_MS,
+    )
+    register_metrics("embed_query_batcher", batcher.stats.as_dict)
+    return batcher
+
+
+async def embed_query(question: str) -> np.ndarray:
+    key = normalize_query(question)
+    embedding = _QUERY_CACHE.get(key)
+    if embedding is None:
+        embedding = await get_query_batcher().submit(key)
+        _QUERY_CACHE.set(key, embedding)
+    return embedding
+
+
+async def embed_queries(questions: List[str]) -> np.ndarray:
+    # Submitted together, so the batcher encodes the misses in one call
+    return np.vstack(await asyncio.gather(*(embed_query(q) for q in questions)))
+
 
+FLAT = "flat"
+HNSW = "hnsw"
+IVFPQ = "ivfpq"
+
+INNER_PRODUCT = "inner_product"
+
+PQ_BITS = 8
+# k-means warns below this many training points per centroid
+IVF_POINTS_PER_LIST = 39
+
+
+@dataclass
+class IndexParams:
+    kind: str
+    factory: str
+    chunks: int
+    trained_on: int = 0
+    metric: str = INNER_PRODUCT
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _pq_subquantizers(dim: int) -> int:
+    return max(m for m in range(1, min(config.FAISS_PQ_M, dim) + 1) if dim % m == 0)
+
+
+def choose_index_params(chunks: int, dim: int) -> IndexParams:
+    kind = config.FAISS_INDEX_TYPE
+    if kind == "auto":
+        kind = FLAT
+        if chunks >= config.FAISS_IVFPQ_MIN_CHUNKS:
+            kind = IVFPQ
+        elif chunks >= config.FAISS_HNSW_MIN_CHUNKS:
+            kind = HNSW
+
+    if kind == IVFPQ:
+        # Centroids are trained on the sample, not on every chunk
+        trained_on = min(chunks, config.FAISS_IVF_MAX_TRAIN_POINTS)
+        nlist = config.FAISS_IVF_NLIST or int(4 * math.sqrt(chunks))
+        nlist = min(nlist, trained_on // IVF_POINTS_PER_LIST)
+        if nlist < 1 or trained_on < 2**PQ_BITS:
+            logger.info(f"{chunks} chunks are too few to train IVF-PQ, using Flat")
+            return IndexParams(kind=FLAT, factory="Flat", chunks=chunks)
+
+        return IndexParams(
+            kind=IVFPQ,
+            factory=f"IVF{nlist},PQ{_pq_subquantizers(dim)}x{PQ_BITS}",
+            chunks=chunks,
+            trained_on=trained_on,
+        )
+
+    if kind == HNSW:
+        return IndexParams(
+            kind=HNSW, factory=f"HNSW{config.FAISS_HNSW_M}", chunks=chunks
+        )
 
-def build_faiss_index(embeddings: np.ndarray) -> faiss.Index:
-    idx = faiss.IndexFlatL2(EMBED_DIM)
+    return IndexParams(kind=FLAT, factory="Flat", chunks=chunks)
+
+
+def apply_search_params(idx: "faiss.Index", kind: str) -> None:
+    faiss = import_faiss()
+
+    # Search-time knobs come from the current config, so they can be tuned
+    # without rebuilding cached indexes
+    if kind == HNSW:
+        faiss.ParameterSpace().set_index_parameter(
+            idx, "efSearch", config.FAISS_HNSW_EF_SEARCH
+        )
+    elif kind == IVFPQ:
+        faiss.ParameterSpace().set_index_parameter(
+            idx, "nprobe", config.FAISS_IVF_NPROBE
+        )
+
+
+def build_faiss_index(
+    embeddings: np.ndarray, params: Optional[IndexParams] = None
+) -> "faiss.Index":
+    faiss = import_faiss()
+
+    # float16 and int8 storage round off the norms, so renormalize a copy
+    embeddings = np.array(embeddings, dtype=np.float32)
+    faiss.normalize_L2(embeddings)
+    dim = embeddings.shape[1]
+    params = params or choose_index_params(len(embeddings), dim)
+
+    started = time.perf_counter()
+    idx = faiss.index_factory(dim, params.factory, faiss.METRIC_INNER_PRODUCT)
+    if params.kind == HNSW:
+        faiss.ParameterSpace().set_index_parameter(
+            idx, "efConstruction", config.FAISS_HNSW_EF_CONSTRUCTION
+        )
+    if not idx.is_trained:
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(embeddings), params.trained_on, replace=False)
+        idx.train(embeddings[np.sort(sample)])
     idx.add(embeddings)
+    apply_search_params(idx, params.kind)
+
+    logger.info(
+        f"Built {params.factory} FAISS index over {len(embeddings)} chunks "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
     return idx
 
 
-def retrieve_chunks(session_id: str, q_emb: np.ndarray, k: int = 5) -> List[str]:
-    embeddings = load_cached_embeddings(session_id)
-    idx = build_faiss_index(embeddings)
-    _, ids = idx.search(q_emb, k)
+def serialize_faiss_index(idx: "faiss.Index", params: IndexParams) -> bytes:
+    faiss = import_faiss()
+
+    return encode_index(faiss.serialize_index(idx).tobytes(), params.as_dict())
+
+
+def deserialize_faiss_index(data: bytes) -> Optional["faiss.Index"]:
+    faiss = import_faiss()
+
+    # Indexes without a header or for another metric would not rank the
+    # normalized queries by cosine similarity, so they count as a miss
+    if not is_encoded_index(data):
+        return None
+    index_data, params = decode_index(data)
+    if params.get("metric") != INNER_PRODUCT:
+        return None
+
+    idx = faiss.deserialize_index(index_data)
+    apply_search_params(idx, params["kind"])
+    return idx
+
+
+def build_serialized_faiss_index(embeddings: np.ndarray) -> Tuple["faiss.Index", bytes]:
+    params = choose_index_params(*embeddings.shape)
+    idx = build_faiss_index(embeddings, params)
+    return idx, serialize_faiss_index(idx, params)
+
+
+async def index_document_embeddings(
+    content_id: str, embeddings: np.ndarray, background: bool = False
+) -> "faiss.Index":
+    executor = get_inference_executor()
+    run = executor.run_when_free if background else executor.run
+    idx, data = await run(build_serialized_faiss_index, embeddings)
+    await cache_faiss_index(content_id, data)
+    _INDEX_CACHE.set(content_id, idx)
+    return idx
+
+
+async def get_document_index(content_id: str) -> "faiss.Index":
+    idx = _INDEX_CACHE.get(content_id)
+    if idx is not None:
+        return idx
+
+    cached = await load_cached_index(content_id)
+    if cached is None:
+        logger.info(f"No cached FAISS index for document {content_id}, building one")
+    else:
+        data, ttl = cached
+        idx = await get_inference_executor().run(deserialize_faiss_index, data)
+        if idx is not None:
+            _INDEX_CACHE.set(content_id, idx, ttl=ttl if ttl > 0 else None)
+            return idx
+        logger.info(
+            f"Cached FAISS index for document {content_id} is stale, rebuilding"
+        )
+    embeddings = await load_cached_embeddings(content_id)
+    return await index_document_embeddings(content_id, embeddings)
+
+
+async def retrieve_chunks(content_id: str, q_emb: np.ndarray, k: int = 5) -> List[str]:
+    idx = await get_document_index(content_id)
+    _, ids = await get_inference_executor().run(idx.search, q_emb, k)
 
-    print(idx, ids)
-    return load_cached_chunks(session_id, *ids)
+    return await load_cached_chunks(content_id, [int(i) for i in ids[0] if i >= 0])
 
 
-def run_rag_pipeline(session_id: str, question: str, k: int = 5) -> Tuple[str, float]:
+async def retrieve_chunks_batch(
+    content_id: str, q_embs: np.ndarray, k: int = 5
+) -> List[List[str]]:
+    idx = await get_document_index(content_id)
+    _, ids = await get_inference_executor().run(idx.search, q_embs, k)
+
+    # One round trip for the union of hits, then split back per question
+    hits = [[int(i) for i in row if i >= 0] for row in ids]
+    chunks = await load_cached_chunk_map(
+        content_id, sorted({i for row in hits for i in row})
+    )
+    return [[chunks[i] for i in row if i in chunks] for row in hits]
+
+
+async def index_document(content_id: str) -> None:
+    executor = get_inference_executor()
+    await update_index_status(content_id, state="running", error="")
+
+    try:
+        pages = await get_document_pages(content_id)
+        chunks = await executor.run_when_free(chunk_pages, pages)
+        texts = [chunk.text for chunk in chunks]
+        await update_index_status(
+            content_id, chunks_total=len(chunks), chunks_embedded=0
+        )
+
+        # Batches of similar length pad less, so chunks are embedded shortest
+        # first and put back in document order
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        embeddings = np.zeros((len(texts), embed_dim()), dtype=np.float32)
+        for start in range(0, len(chunks), config.EMBED_BATCH_SIZE):
+            batch = order[start : start + config.EMBED_BATCH_SIZE]
+            embeddings[batch] = await executor.run_when_free(
+                embed_chunks, [texts[i] for i in batch]
+            )
+            await update_index_status(content_id, chunks_embedded=start + len(batch))
+
+        await cache_chunks_and_embeddings(
+            content_id,
+            texts,
+            embeddings,
+            MODEL_NAME,
+            metadata=[chunk.metadata() for chunk in chunks],
+        )
+        await index_document_embeddings(content_id, embeddings, background=True)
+    except Exception as e:
+        await update_index_status(content_id, state="failed", error=str(e))
+        raise
+
+    await update_index_status(content_id, state="ready")
+
+
+def schedule_document_indexing(content_id: str) -> None:
+    _INDEXING.start(
+        content_id,
+        lambda: index_document(content_id),
+        lambda: has_cached_embeddings(content_id),
+    )
+
+
+async def ensure_document_indexed(content_id: str) -> None:
+    if not _INDEXING.in_flight(content_id) and await has_cached_embeddings(content_id):
+        return
+
+    await _INDEXING.do(
+        content_id,
+        lambda: index_document(content_id),
+        lambda: has_cached_embeddings(content_id),
+    )
+
+
+async def run_rag_pipeline(
+    session_id: str, question: str, k: int = 5
+) -> Tuple[str, float]:
     logger.info(f"Starting RAG pipeline with modrl {MODEL_NAME}")
 
-    if not has_cached_embeddings(session_id):
-        full_text = get_session_text(session_id).page_texts
-        chunks = chunk_paragraphs(full_text)
-        embeddings = embed_chunks(chunks)
-        cache_chunks_and_embeddings(session_id, chunks, embeddings)
+    content_id = await resolve_content_id(session_id)
+    await ensure_document_indexed(content_id)
 
-    q_emb = _EMBEDDER.encode([question], convert_to_numpy=True)
-    chunks = retrieve_chunks(session_id, q_emb, k)
+    q_emb = (await embed_query(question))[None, :]
+    chunks = await retrieve_chunks(content_id, q_emb, k)
     if not chunks:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No relevant chunks found for session {session_id}",
         )
 
-    answer, score = run_qa_model(question, chunks)
+    answer, score = await run_qa_model(question, chunks)
     logger.info(f"RAG pipeline complete. Answer: {answer}, Score: {score}")
     return answer, score
+
+
+async def run_rag_questions(
+    content_id: str, questions: List[str], k: int = 5
+) -> List[Tuple[str, float]]:
+    await ensure_document_indexed(content_id)
+
+    q_embs = await embed_queries(questions)
+    retrieved = await retrieve_chunks_batch(content_id, q_embs, k)
+    if not all(retrieved):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No relevant chunks found for document {content_id}",
+        )
+
+    # Submitted together, so the QA batcher groups them into shared forward passes
+    results = await asyncio.gather(
+        *(run_qa_model(q, chunks) for q, chunks in zip(questions, retrieved))
+    )
+    logger.info(
+        f"RAG pipeline answered {len(questions)} questions for document {content_id}"
+    )
+    return list(results)
@@ -1,11 +1,22 @@
+import json
 import logging
+from typing import AsyncIterator
 
 from app.internal.auth import get_session_id_from_token
-from app.models.ask import AskRequest, MultiAskResponse, SingleModelAnswer
-from app.pipelines.ner import extract_entities
-from app.pipelines.qa import run_qa_pipeline
-from app.pipelines.rag import run_rag_pipeline
-from fastapi import APIRouter, Depends, Form, status
+from app.models.ask import (
+    AskBatchRequest,
+    AskRequest,
+    BatchAskResponse,
+    MultiAskResponse,
+)
+from app.services.ask import (
+    AnswerEvent,
+    answer_question,
+    answer_questions,
+    stream_answers,
+)
+from fastapi import APIRouter, Depends, Form, Header, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials
 
 router = APIRouter()
@@ -19,32 +30,92 @@ logger = logging.getLogger(__name__)
     summary="Ask a question over an existing document session",
 )
 async def ask(
+    response: Response,
     req: AskRequest = Form(..., description="Your question text"),
     creds: HTTPAuthorizationCredentials = Depends(get_session_id_from_token),
+    cache_bypass: bool = Header(
+        False,
+        alias="X-Cache-Bypass",
+        description="Recompute the answers instead of serving them from the cache",
+    ),
 ):
     session_id = creds
 
-    answer, score = run_qa_pipeline(session_id, req.question)
-
-    simple_qa = SingleModelAnswer(
-        model_name="Full-Context QA (DistilBERT-SQuAD)",
-        description="Runs a DistilBERT-based QA model directly over the entire session text "
-        "concatenated into one context.",
-        answer=answer,
-        score=score,
-        entities=extract_entities(answer),
+    result, cache_status = await answer_question(
+        session_id,
+        req.question,
+        include_entities=req.include_entities,
+        bypass_cache=cache_bypass,
     )
+    response.headers["X-Answer-Cache"] = cache_status
+
+    return result
 
-    answer, score = run_rag_pipeline(session_id, req.question)
 
-    rag_answer = SingleModelAnswer(
-        model_name="RAG-Augmented QA (MiniLM + DistilBERT-SQuAD)",
-        description="First embeds and retrieves the top-k most relevant text chunks via "
-        "a MiniLM embedding + FAISS index, then runs the same DistilBERT-SQuAD "
-        "QA model on those chunks to produce a more focused answer.",
-        answer=answer,
-        score=score,
-        entities=extract_entities(answer),
+@router.post(
+    "/ask/batch",
+    response_model=BatchAskResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Ask several questions over an existing document session at once",
+)
+async def ask_batch(
+    req: AskBatchRequest,
+    response: Response,
+    creds: HTTPAuthorizationCredentials = Depends(get_session_id_from_token),
+    cache_bypass: bool = Header(
+        False,
+        alias="X-Cache-Bypass",
+        description="Recompute the answers instead of serving them from the cache",
+    ),
+):
+    session_id = creds
+
+    result, cache_statuses = await answer_questions(
+        session_id,
+        req.questions,
+        include_entities=req.include_entities,
+        bypass_cache=cache_bypass,
     )
+    # One status per question, in request order
+    response.headers["X-Answer-Cache"] = ",".join(cache_statuses)
+
+    return result
+
 
-    return MultiAskResponse(results=[simple_qa, rag_answer])
+async def format_events(events: AsyncIterator[AnswerEvent]) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post(
+    "/ask/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Stream each model's answer as a server-sent event as soon as it is ready",
+    response_class=StreamingResponse,
+)
+async def ask_stream(
+    req: AskRequest = Form(..., description="Your question text"),
+    creds: HTTPAuthorizationCredentials = Depends(get_session_id_from_token),
+    cache_bypass: bool = Header(
+        False,
+        alias="X-Cache-Bypass",
+        description="Recompute the answers instead of serving them from the cache",
+    ),
+):
+    session_id = creds
+
+    events, cache_status = await stream_answers(
+        session_id,
+        req.question,
+        include_entities=req.include_entities,
+        bypass_cache=cache_bypass,
+    )
+    return StreamingResponse(
+        format_events(events),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Answer-Cache": cache_status,
+        },
+    )
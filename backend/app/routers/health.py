@@ -0,0 +1,45 @@
+import logging
+
+from app.internal.model_registry import get_model_registry
+from app.models.health import HealthResponse
+from fastapi import APIRouter, Response, status
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/healthz",
+    response_model=HealthResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Liveness: fails only if a model could not be loaded",
+)
+async def healthz(response: Response):
+    registry = get_model_registry()
+
+    if registry.failed():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return HealthResponse(status="failed", models=registry.states())
+
+    state = "ok" if registry.ready() else "loading"
+    return HealthResponse(status=state, models=registry.states())
+
+
+@router.get(
+    "/readyz",
+    response_model=HealthResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Readiness: succeeds once every model is loaded and warmed up",
+)
+async def readyz(response: Response):
+    registry = get_model_registry()
+
+    if registry.failed():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return HealthResponse(status="failed", models=registry.states())
+
+    if not registry.ready():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return HealthResponse(status="loading", models=registry.states())
+
+    return HealthResponse(status="ok", models=registry.states())
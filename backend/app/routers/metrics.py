@@ -0,0 +1,16 @@
+import logging
+
+from app.internal.metrics import collect_metrics
+from fastapi import APIRouter, status
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    summary="Runtime metrics of the inference components",
+)
+async def metrics():
+    return collect_metrics()
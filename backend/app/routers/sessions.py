@@ -0,0 +1,46 @@
+import logging
+
+from app.internal.auth import get_session_id_from_token
+from app.models.session import SessionStatusResponse
+from app.services.session import get_index_status, resolve_content_id
+from fastapi import APIRouter, Depends, HTTPException, status
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/sessions/{session_id}/status",
+    response_model=SessionStatusResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Progress of text extraction and background indexing for a session",
+)
+async def session_status(
+    session_id: str,
+    token_session_id: str = Depends(get_session_id_from_token),
+):
+    if session_id != token_session_id:
+        raise HTTPException(
+            status.HTTP_403_FORBIDDEN,
+            detail="Session token does not match the requested session",
+        )
+
+    data = await get_index_status(await resolve_content_id(session_id))
+    if not data:
+        raise HTTPException(
+            status.HTTP_404_NOT_FOUND,
+            detail="Session expired or not found",
+        )
+
+    return SessionStatusResponse(
+        session_id=session_id,
+        state=data.get("state", "pending"),
+        pages_extracted=int(data.get("pages_extracted", 0)),
+        chunks_total=int(data["chunks_total"]) if "chunks_total" in data else None,
+        chunks_embedded=int(data.get("chunks_embedded", 0)),
+        error=data.get("error") or None,
+        embeddings_dtype=data.get("embeddings_dtype"),
+        embeddings_bytes=(
+            int(data["embeddings_bytes"]) if "embeddings_bytes" in data else None
+        ),
+    )
@@ -2,6 +2,7 @@ import logging
 
 from app.internal.auth import create_session_token
 from app.models.upload import UploadResponse
+from app.pipelines.rag import schedule_document_indexing
 from app.services.upload import create_document_session
 from fastapi import APIRouter, File, UploadFile, status
 
@@ -13,12 +14,14 @@ logger = logging.getLogger(__name__)
     "/upload",
     response_model=UploadResponse,
     status_code=status.HTTP_200_OK,
-    summary="Upload a PDF, extract text, and start a session",
+    summary="Upload a PDF, extract text, and start a session; indexing for RAG "
+    "continues in the background",
 )
 async def upload_and_extract(file: UploadFile = File(...)):
     session = await create_document_session(file)
     pages = session.page_texts
     token = create_session_token(session.session_id)
+    schedule_document_indexing(session.content_id)
 
     return UploadResponse(
         session_token=token,
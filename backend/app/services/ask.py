@@ -0,0 +1,374 @@
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.internal.config import config
+from app.internal.executor import get_inference_executor
+from app.internal.metrics import register_metrics
+from app.models.ask import (
+    BatchAskResponse,
+    Entity,
+    MultiAskResponse,
+    SingleModelAnswer,
+)
+from app.pipelines import ner, qa, qa_engine, rag
+from app.pipelines.backends import resolve_backend
+from app.pipelines.qa_engine import QATimings
+from app.services.session import (
+    cache_answer,
+    cache_answers,
+    load_cached_answer,
+    load_cached_answers,
+    resolve_content_id,
+)
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+# Bumped when normalize_question changes, so entries under old keys are not read
+ANSWER_KEY_VERSION = 2
+
+
+def _model_signature() -> str:
+    parts = [
+        ANSWER_KEY_VERSION,
+        qa_engine.MODEL_NAME,
+        qa.MODEL_NAME,
+        rag.MODEL_NAME,
+        ner.MODEL_NAME,
+        config.QA_WINDOW_SIZE,
+        config.QA_WINDOW_STRIDE,
+        config.QA_MAX_WINDOWS,
+        config.QA_MAX_QUESTION_TOKENS,
+        config.QA_MAX_ANSWER_TOKENS,
+        config.QA_EARLY_EXIT_SCORE,
+        config.CHUNK_MAX_TOKENS,
+        config.CHUNK_OVERLAP_TOKENS,
+        config.FAISS_INDEX_TYPE,
+        config.EMBEDDINGS_DTYPE,
+        config.FAISS_HNSW_MIN_CHUNKS,
+        config.FAISS_IVFPQ_MIN_CHUNKS,
+        config.FAISS_HNSW_EF_SEARCH,
+        config.FAISS_IVF_NPROBE,
+        resolve_backend(config.QA_BACKEND),
+        resolve_backend(config.NER_BACKEND),
+        resolve_backend(config.EMBED_BACKEND),
+    ]
+    return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+MODEL_SIGNATURE = _model_signature()
+
+
+@dataclass
+class AnswerCacheStats:
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_CACHE_STATS = AnswerCacheStats()
+register_metrics("answer_cache", _CACHE_STATS.as_dict)
+
+
+def normalize_question(question: str) -> str:
+    # The QA and embedding tokenizers lowercase and split on whitespace, so
+    # this does not change the model input
+    return " ".join(question.lower().split())
+
+
+def cached_response(data: bytes) -> MultiAskResponse:
+    # Timings describe the request that computed the answer, not this one
+    response = MultiAskResponse.model_validate_json(data)
+    for result in response.results:
+        result.timings = None
+    return response
+
+
+def answer_fingerprint(question: str, include_entities: bool = True) -> str:
+    digest = hashlib.sha256(normalize_question(question).encode()).hexdigest()
+    variant = "ner" if include_entities else "plain"
+    return f"{MODEL_SIGNATURE}:{variant}:{digest}"
+
+
+def full_context_answer(
+    qa_result: Tuple[str, float, QATimings], entities: Optional[List[Entity]]
+) -> SingleModelAnswer:
+    qa_answer, qa_score, qa_timings = qa_result
+
+    return SingleModelAnswer(
+        model_name="Full-Context QA (DistilBERT-SQuAD)",
+        description="Runs a DistilBERT-based QA model directly over the entire session text "
+        "concatenated into one context, searched in overlapping token windows.",
+        answer=qa_answer,
+        score=qa_score,
+        entities=entities,
+        timings=qa_timings,
+    )
+
+
+def retrieval_answer(
+    rag_result: Tuple[str, float], entities: Optional[List[Entity]]
+) -> SingleModelAnswer:
+    rag_answer, rag_score = rag_result
+
+    return SingleModelAnswer(
+        model_name="RAG-Augmented QA (MiniLM + DistilBERT-SQuAD)",
+        description="First embeds and retrieves the top-k most relevant text chunks via "
+        "a MiniLM embedding + FAISS index, then runs the same DistilBERT-SQuAD "
+        "QA model on those chunks to produce a more focused answer.",
+        answer=rag_answer,
+        score=rag_score,
+        entities=entities,
+    )
+
+
+def build_response(
+    qa_result: Tuple[str, float, QATimings],
+    rag_result: Tuple[str, float],
+    qa_entities: Optional[List[Entity]],
+    rag_entities: Optional[List[Entity]],
+) -> MultiAskResponse:
+    return MultiAskResponse(
+        results=[
+            full_context_answer(qa_result, qa_entities),
+            retrieval_answer(rag_result, rag_entities),
+        ]
+    )
+
+
+async def compute_answers(
+    session_id: str, question: str, include_entities: bool = True
+) -> MultiAskResponse:
+    executor = get_inference_executor()
+
+    qa_result, rag_result = await asyncio.gather(
+        qa.run_qa_pipeline(session_id, question),
+        rag.run_rag_pipeline(session_id, question),
+    )
+    qa_entities, rag_entities = None, None
+    if include_entities:
+        qa_entities, rag_entities = await executor.run(
+            ner.extract_entities, [qa_result[0], rag_result[0]]
+        )
+
+    return build_response(qa_result, rag_result, qa_entities, rag_entities)
+
+
+async def compute_batch_answers(
+    content_id: str, questions: List[str], include_entities: bool = True
+) -> List[MultiAskResponse]:
+    executor = get_inference_executor()
+
+    qa_results, rag_results = await asyncio.gather(
+        qa.run_qa_questions(content_id, questions),
+        rag.run_rag_questions(content_id, questions),
+    )
+    entities = [None] * (2 * len(questions))
+    if include_entities:
+        # Both answers of every question go through NER as one batch
+        texts = [r[0] for pair in zip(qa_results, rag_results) for r in pair]
+        entities = await executor.run(ner.extract_entities, texts)
+
+    return [
+        build_response(qa_result, rag_result, entities[2 * i], entities[2 * i + 1])
+        for i, (qa_result, rag_result) in enumerate(zip(qa_results, rag_results))
+    ]
+
+
+async def lookup_answer(
+    content_id: str, fingerprint: str, bypass_cache: bool
+) -> Tuple[Optional[MultiAskResponse], str]:
+    if bypass_cache:
+        _CACHE_STATS.bypassed += 1
+        return None, "BYPASS"
+
+    cached = await load_cached_answer(content_id, fingerprint)
+    if cached is not None:
+        _CACHE_STATS.hits += 1
+        logger.info(f"Answer cache hit for document {content_id}")
+        return cached_response(cached), "HIT"
+
+    _CACHE_STATS.misses += 1
+    return None, "MISS"
+
+
+async def answer_question(
+    session_id: str,
+    question: str,
+    include_entities: bool = True,
+    bypass_cache: bool = False,
+) -> Tuple[MultiAskResponse, str]:
+    content_id = await resolve_content_id(session_id)
+    fingerprint = answer_fingerprint(question, include_entities)
+
+    cached, cache_status = await lookup_answer(content_id, fingerprint, bypass_cache)
+    if cached is not None:
+        return cached, cache_status
+
+    response = await compute_answers(session_id, question, include_entities)
+    await cache_answer(content_id, fingerprint, response.model_dump_json())
+    return response, cache_status
+
+
+async def answer_questions(
+    session_id: str,
+    questions: List[str],
+    include_entities: bool = True,
+    bypass_cache: bool = False,
+) -> Tuple[BatchAskResponse, List[str]]:
+    if len(questions) > config.ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {config.ASK_BATCH_MAX_QUESTIONS} questions per request",
+        )
+
+    content_id = await resolve_content_id(session_id)
+    fingerprints = [answer_fingerprint(q, include_entities) for q in questions]
+    answers: Dict[str, MultiAskResponse] = {}
+
+    if bypass_cache:
+        _CACHE_STATS.bypassed += len(questions)
+        statuses = ["BYPASS"] * len(questions)
+    else:
+        cached = await load_cached_answers(content_id, fingerprints)
+        statuses = []
+        for fingerprint, data in zip(fingerprints, cached):
+            if data is not None:
+                answers[fingerprint] = cached_response(data)
+                _CACHE_STATS.hits += 1
+                statuses.append("HIT")
+            else:
+                _CACHE_STATS.misses += 1
+                statuses.append("MISS")
+
+    # Equivalent questions within the batch are answered once
+    missing: Dict[str, str] = {}
+    for question, fingerprint in zip(questions, fingerprints):
+        if fingerprint not in answers:
+            missing.setdefault(fingerprint, question)
+
+    if missing:
+        logger.info(
+            f"Answering {len(missing)} of {len(questions)} questions "
+            f"for document {content_id}"
+        )
+        computed = await compute_batch_answers(
+            content_id, list(missing.values()), include_entities
+        )
+        answers.update(zip(missing, computed))
+        await cache_answers(
+            content_id,
+            {fp: response.model_dump_json() for fp, response in zip(missing, computed)},
+        )
+
+    results = [answers[fingerprint] for fingerprint in fingerprints]
+    return BatchAskResponse(results=results), statuses
+
+
+AnswerEvent = Tuple[str, Dict[str, Any]]
+
+
+def _answer_event(index: int, answer: SingleModelAnswer) -> AnswerEvent:
+    data = answer.model_dump(mode="json")
+    if answer.entities is None:
+        # Entities of a fresh answer follow in their own event
+        data.pop("entities")
+    return "answer", {"index": index, **data}
+
+
+def _entities_event(index: int, entities: List[Entity]) -> AnswerEvent:
+    return "entities", {
+        "index": index,
+        "entities": [entity.model_dump(mode="json") for entity in entities],
+    }
+
+
+async def _replay_answers(
+    response: MultiAskResponse, cache_status: str
+) -> AsyncIterator[AnswerEvent]:
+    for index, answer in enumerate(response.results):
+        yield _answer_event(index, answer)
+    yield "done", {"cache": cache_status}
+
+
+async def _stream_answers(
+    session_id: str,
+    content_id: str,
+    question: str,
+    include_entities: bool,
+    fingerprint: str,
+    cache_status: str,
+) -> AsyncIterator[AnswerEvent]:
+    executor = get_inference_executor()
+    builders = [full_context_answer, retrieval_answer]
+    answers: List[Optional[SingleModelAnswer]] = [None, None]
+
+    pending: Dict[asyncio.Future, Tuple[str, int]] = {
+        asyncio.ensure_future(qa.run_qa_pipeline(session_id, question)): ("answer", 0),
+        asyncio.ensure_future(rag.run_rag_pipeline(session_id, question)): (
+            "answer",
+            1,
+        ),
+    }
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                kind, index = pending.pop(task)
+                if kind == "answer":
+                    answers[index] = builders[index](task.result(), None)
+                    yield _answer_event(index, answers[index])
+                    if include_entities:
+                        ner_task = asyncio.ensure_future(
+                            executor.run(ner.extract_entities, [answers[index].answer])
+                        )
+                        pending[ner_task] = ("entities", index)
+                else:
+                    answers[index].entities = task.result()[0]
+                    yield _entities_event(index, answers[index].entities)
+    except HTTPException as e:
+        yield "error", {"status_code": e.status_code, "detail": e.detail}
+        return
+    except Exception:
+        logger.exception(f"Streaming answers for document {content_id} failed")
+        yield "error", {"status_code": 500, "detail": "Failed to answer the question"}
+        return
+    finally:
+        for task in pending:
+            task.cancel()
+
+    response = MultiAskResponse(results=answers)
+    await cache_answer(content_id, fingerprint, response.model_dump_json())
+    yield "done", {"cache": cache_status}
+
+
+async def stream_answers(
+    session_id: str,
+    question: str,
+    include_entities: bool = True,
+    bypass_cache: bool = False,
+) -> Tuple[AsyncIterator[AnswerEvent], str]:
+    # Session and cache errors surface as a status code before the stream starts
+    content_id = await resolve_content_id(session_id)
+    fingerprint = answer_fingerprint(question, include_entities)
+
+    cached, cache_status = await lookup_answer(content_id, fingerprint, bypass_cache)
+    if cached is not None:
+        return _replay_answers(cached, cache_status), cache_status
+
+    events = _stream_answers(
+        session_id, content_id, question, include_entities, fingerprint, cache_status
+    )
+    return events, cache_status
@@ -0,0 +1,93 @@
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+MAGIC = b"DIEM"
+VERSION = 1
+
+# magic, version, dtype code, model name length, rows, cols
+_HEADER = struct.Struct("<4sBBHII")
+_ALIGNMENT = 8
+
+_DTYPE_CODES = {"float32": 1, "float16": 2, "int8": 3}
+_CODE_DTYPES = {
+    code: np.dtype(name).newbyteorder("<") for name, code in _DTYPE_CODES.items()
+}
+
+
+@dataclass
+class EmbeddingHeader:
+    version: int
+    dtype: str
+    model_name: str
+    shape: tuple[int, int]
+
+
+def is_encoded_embeddings(data: bytes) -> bool:
+    return data[: len(MAGIC)] == MAGIC
+
+
+def encode_embeddings(
+    embeddings: np.ndarray, model_name: str, dtype: str = "float32"
+) -> bytes:
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported embedding dtype {dtype!r}")
+    if embeddings.ndim != 2:
+        raise ValueError(
+            f"Expected a 2-D embedding matrix, got shape {embeddings.shape}"
+        )
+
+    name = model_name.encode()
+    rows, cols = embeddings.shape
+    header = _HEADER.pack(MAGIC, VERSION, _DTYPE_CODES[dtype], len(name), rows, cols)
+    header += name
+    header += b"\0" * (-len(header) % _ALIGNMENT)
+
+    if dtype == "int8":
+        return header + _quantize_int8(embeddings)
+
+    payload = np.ascontiguousarray(embeddings, dtype=_CODE_DTYPES[_DTYPE_CODES[dtype]])
+    return header + payload.tobytes()
+
+
+def _quantize_int8(embeddings: np.ndarray) -> bytes:
+    # Symmetric scalar quantization with one float32 scale per row, stored
+    # after the int8 matrix
+    scales = np.abs(embeddings).max(axis=1).astype(np.float32) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+
+    payload = codes.tobytes()
+    payload += b"\0" * (-len(payload) % _ALIGNMENT)
+    return payload + scales.astype("<f4").tobytes()
+
+
+def decode_embeddings(data: bytes) -> tuple[np.ndarray, EmbeddingHeader]:
+    if not is_encoded_embeddings(data):
+        raise ValueError("Not an encoded embedding matrix")
+
+    _, version, code, name_len, rows, cols = _HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unsupported embedding format version {version}")
+    if code not in _CODE_DTYPES:
+        raise ValueError(f"Unknown embedding dtype code {code}")
+
+    name_end = _HEADER.size + name_len
+    model_name = bytes(data[_HEADER.size : name_end]).decode()
+    offset = name_end + (-name_end % _ALIGNMENT)
+
+    dtype = _CODE_DTYPES[code]
+    embeddings = np.frombuffer(data, dtype=dtype, count=rows * cols, offset=offset)
+    if dtype == np.int8:
+        scales_offset = offset + rows * cols + (-(rows * cols) % _ALIGNMENT)
+        scales = np.frombuffer(data, dtype="<f4", count=rows, offset=scales_offset)
+        embeddings = embeddings.reshape(rows, cols) * scales[:, None]
+
+    header = EmbeddingHeader(
+        version=version,
+        dtype=dtype.name,
+        model_name=model_name,
+        shape=(rows, cols),
+    )
+    return embeddings.reshape(rows, cols), header
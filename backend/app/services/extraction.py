@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional
+
+import aiofiles
+import aiofiles.os
+import fitz
+from app.internal.config import config
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+@asynccontextmanager
+async def spooled_upload(upload_file: UploadFile) -> AsyncIterator[SpooledUpload]:
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=".pdf")
+    os.close(fd)
+
+    try:
+        size = 0
+        digest = hashlib.sha256()
+        async with aiofiles.open(path, "wb") as out:
+            while chunk := await upload_file.read(UPLOAD_READ_SIZE):
+                size += len(chunk)
+                if size > config.MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"PDF exceeds the {config.MAX_UPLOAD_BYTES} byte limit",
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+
+        logger.info(f"Spooled upload {upload_file.filename} to {path}: {size} bytes")
+        yield SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
+    finally:
+        await aiofiles.os.remove(path)
+
+
+def link_spooled_file(path: str) -> str:
+    # A second name keeps the bytes on disk after the request that spooled
+    # them is gone, for as long as a shared extraction job needs them
+    job_path = f"{path}.job"
+    os.link(path, job_path)
+    return job_path
+
+
+def remove_file(path: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def extract_page_range(doc: fitz.Document, start: int, end: int) -> List[str]:
+    return [doc[i].get_text() for i in range(start, end)]
+
+
+def extract_page_slice(path: str, start: int, end: int) -> List[str]:
+    with fitz.open(path) as doc:
+        return extract_page_range(doc, start, end)
+
+
+@lru_cache()
+def get_extraction_pool() -> Optional[ProcessPoolExecutor]:
+    if config.PDF_EXTRACT_WORKERS <= 1:
+        return None
+
+    logger.info(
+        f"Starting PDF extraction pool with {config.PDF_EXTRACT_WORKERS} processes"
+    )
+    return ProcessPoolExecutor(
+        max_workers=config.PDF_EXTRACT_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def shutdown_extraction_pool() -> None:
+    pool = get_extraction_pool()
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+    get_extraction_pool.cache_clear()
+
+
+async def _iter_sequential(
+    doc: fitz.Document, batch_size: int
+) -> AsyncIterator[List[str]]:
+    for start in range(0, doc.page_count, batch_size):
+        end = min(start + batch_size, doc.page_count)
+        yield await run_in_threadpool(extract_page_range, doc, start, end)
+
+
+async def _iter_parallel(
+    pool: ProcessPoolExecutor, path: str, page_count: int, batch_size: int
+) -> AsyncIterator[List[str]]:
+    loop = asyncio.get_running_loop()
+    max_in_flight = 2 * config.PDF_EXTRACT_WORKERS
+    in_flight: deque[asyncio.Future] = deque()
+    next_start = 0
+
+    try:
+        while next_start < page_count or in_flight:
+            while next_start < page_count and len(in_flight) < max_in_flight:
+                end = min(next_start + batch_size, page_count)
+                in_flight.append(
+                    loop.run_in_executor(
+                        pool, extract_page_slice, path, next_start, end
+                    )
+                )
+                next_start = end
+
+            # Slices finish out of order, but are handed out in page order
+            yield await in_flight.popleft()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+async def iter_page_batches(path: str, batch_size: int) -> AsyncIterator[List[str]]:
+    doc = await run_in_threadpool(fitz.open, path)
+    try:
+        page_count = doc.page_count
+        if page_count > config.MAX_PDF_PAGES:
+            raise HTTPException(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"PDF has {page_count} pages, the limit is {config.MAX_PDF_PAGES}",
+            )
+
+        pool = get_extraction_pool()
+        if pool is None or page_count <= batch_size:
+            async for pages in _iter_sequential(doc, batch_size):
+                yield pages
+            return
+    finally:
+        doc.close()
+
+    # Each worker process opens its own handle on the spooled file
+    async for pages in _iter_parallel(pool, path, page_count, batch_size):
+        yield pages
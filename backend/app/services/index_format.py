@@ -0,0 +1,33 @@
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+MAGIC = b"DIFX"
+VERSION = 1
+
+# magic, version, params length; the params are JSON, the rest a FAISS index
+_HEADER = struct.Struct("<4sBI")
+
+
+def is_encoded_index(data: bytes) -> bool:
+    return data[: len(MAGIC)] == MAGIC
+
+
+def encode_index(index_data: bytes, params: Dict[str, Any]) -> bytes:
+    encoded = json.dumps(params, sort_keys=True).encode()
+    return _HEADER.pack(MAGIC, VERSION, len(encoded)) + encoded + index_data
+
+
+def decode_index(data: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    if not is_encoded_index(data):
+        raise ValueError("Not an encoded FAISS index")
+
+    _, version, params_len = _HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Unsupported index format version {version}")
+
+    params_end = _HEADER.size + params_len
+    params = json.loads(bytes(data[_HEADER.size : params_end]))
+    return np.frombuffer(data, dtype=np.uint8, offset=params_end), params
@@ -0,0 +1,43 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobRegistry:
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def get(self, key: str) -> Optional[asyncio.Task]:
+        task = self._tasks.get(key)
+        if task is not None and task.done():
+            return None
+        return task
+
+    def start(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self.get(key)
+        if task is not None:
+            return task
+
+        logger.info(f"Starting {self.name} job for {key}")
+        task = asyncio.get_running_loop().create_task(factory())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return task
+
+    async def wait(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        # Shielded so a cancelled waiter does not cancel the shared job
+        return await asyncio.shield(self.start(key, factory))
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+        if task.cancelled():
+            logger.warning(f"{self.name} job for {key} was cancelled")
+        elif task.exception() is not None:
+            logger.error(f"{self.name} job for {key} failed: {task.exception()!r}")
+        else:
+            logger.info(f"{self.name} job for {key} finished")
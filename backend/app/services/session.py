@@ -1,111 +1,325 @@
+import json
 import logging
-import pickle
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 import numpy as np
-from app.internal.redis import redis_client
+from app.internal.config import config
+from app.internal.redis import get_redis_client
 from app.models.domain import DocumentSession
+from app.services.embedding_format import (
+    decode_embeddings,
+    encode_embeddings,
+    is_encoded_embeddings,
+)
 from fastapi import HTTPException, status
+from redis.exceptions import ResponseError
 
 SESSION_TTL = 3600
 
+# session:<session_id> points at the content entry of the uploaded PDF; every
+# other key is addressed by that content id (SHA-256 of the PDF bytes)
 SESSION_PREFIX = "session:"
+PAGES_PREFIX = "pages:"
+STAGING_SUFFIX = ":staging"
 EMBEDS_PREFIX = "embeds:"
 CHUNKS_PREFIX = "chunks:"
+CHUNK_META_PREFIX = "chunkmeta:"
+INDEX_PREFIX = "index:"
+STATUS_PREFIX = "status:"
+ANSWER_PREFIX = "answer:"
+
+CONTENT_PREFIXES = (
+    PAGES_PREFIX,
+    CHUNKS_PREFIX,
+    CHUNK_META_PREFIX,
+    EMBEDS_PREFIX,
+    INDEX_PREFIX,
+    STATUS_PREFIX,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def get_session_text(session_id: str) -> DocumentSession:
-    key = f"{SESSION_PREFIX}{session_id}"
-    logger.info(f"Fetching session text from Redis {key}")
+async def resolve_content_id(session_id: str) -> str:
+    not_found = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Session expired or not found",
+    )
 
-    data = redis_client.get(key)
+    # Sessions from before content addressing hold a pickled page list or a
+    # Redis list under the same key; they are treated as expired
+    try:
+        data = await get_redis_client().get(f"{SESSION_PREFIX}{session_id}")
+    except ResponseError as e:
+        if "WRONGTYPE" not in str(e):
+            raise
+        raise not_found
     if data is None:
+        raise not_found
+
+    try:
+        return data.decode()
+    except UnicodeDecodeError:
+        raise not_found
+
+
+async def get_document_pages(content_id: str) -> List[str]:
+    key = f"{PAGES_PREFIX}{content_id}"
+    logger.info(f"Fetching document text from Redis {key}")
+
+    data = await get_redis_client().lrange(key, 0, -1)
+    if not data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session expired or not found",
         )
 
-    try:
-        pages: list[str] = pickle.loads(data)
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Corrupted session data",
-        )
+    return [page.decode() for page in data]
+
 
-    return DocumentSession(session_id=session_id, page_texts=pages)
+async def get_session_text(session_id: str) -> DocumentSession:
+    content_id = await resolve_content_id(session_id)
 
+    return DocumentSession(
+        session_id=session_id,
+        page_texts=await get_document_pages(content_id),
+        content_id=content_id,
+    )
 
-def cache_chunks_and_embeddings(
-    session_id: str, chunks: List[str], embeddings: np.ndarray
+
+async def cache_chunks_and_embeddings(
+    content_id: str,
+    chunks: List[str],
+    embeddings: np.ndarray,
+    model_name: str,
+    metadata: Optional[List[Dict[str, int]]] = None,
 ):
-    chunks_key = f"{CHUNKS_PREFIX}{session_id}"
+    chunks_key = f"{CHUNKS_PREFIX}{content_id}"
+    meta_key = f"{CHUNK_META_PREFIX}{content_id}"
+    embeds_key = f"{EMBEDS_PREFIX}{content_id}"
+    index_key = f"{INDEX_PREFIX}{content_id}"
+    status_key = f"{STATUS_PREFIX}{content_id}"
 
-    redis_client.delete(chunks_key)
+    data = encode_embeddings(embeddings, model_name, dtype=config.EMBEDDINGS_DTYPE)
 
+    # One MULTI/EXEC so readers never see chunks without their embeddings
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.delete(chunks_key, meta_key, index_key)
     mapping = {str(i): chunks[i] for i in range(len(chunks))}
     if mapping:
-        redis_client.hset(chunks_key, mapping=mapping)
-        redis_client.expire(chunks_key, SESSION_TTL)
-
-    embeds_key = f"{EMBEDS_PREFIX}{session_id}"
-    redis_client.setex(embeds_key, SESSION_TTL, pickle.dumps(embeddings))
+        pipe.hset(chunks_key, mapping=mapping)
+        pipe.expire(chunks_key, SESSION_TTL)
+    if metadata:
+        pipe.hset(
+            meta_key, mapping={str(i): json.dumps(m) for i, m in enumerate(metadata)}
+        )
+        pipe.expire(meta_key, SESSION_TTL)
+    pipe.setex(embeds_key, SESSION_TTL, data)
+    pipe.hset(
+        status_key,
+        mapping={
+            "embeddings_dtype": config.EMBEDDINGS_DTYPE,
+            "embeddings_bytes": str(len(data)),
+        },
+    )
+    pipe.expire(status_key, SESSION_TTL)
+    await pipe.execute()
 
-    logger.info(f"Cached session {session_id}: {len(chunks)} chunks")
+    logger.info(
+        f"Cached document {content_id}: {len(chunks)} chunks, "
+        f"{len(data)} bytes of {config.EMBEDDINGS_DTYPE} embeddings"
+    )
 
 
-def load_cached_embeddings(session_id: str) -> np.ndarray:
-    key = f"{EMBEDS_PREFIX}{session_id}"
+async def load_cached_embeddings(content_id: str) -> np.ndarray:
+    key = f"{EMBEDS_PREFIX}{content_id}"
 
-    data = redis_client.get(key)
+    data = await get_redis_client().get(key)
     if data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Session {session_id} expired or not found",
+            detail="Session expired or not found",
         )
 
-    embeddings = pickle.loads(data)
+    if not is_encoded_embeddings(data):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Corrupted session embeddings",
+        )
+
+    embeddings, _ = decode_embeddings(data)
     return embeddings
 
 
-def load_cached_chunks(session_id: str, chunk_ids: List[int]) -> List[str]:
-    key = f"{CHUNKS_PREFIX}{session_id}"
+async def cache_faiss_index(content_id: str, data: bytes):
+    key = f"{INDEX_PREFIX}{content_id}"
+
+    await get_redis_client().setex(key, SESSION_TTL, data)
+    logger.info(f"Cached FAISS index for document {content_id}: {len(data)} bytes")
+
+
+async def load_cached_index(content_id: str) -> Optional[Tuple[bytes, int]]:
+    key = f"{INDEX_PREFIX}{content_id}"
+
+    pipe = get_redis_client().pipeline(transaction=False)
+    pipe.get(key)
+    pipe.ttl(key)
+    data, ttl = await pipe.execute()
+    if data is None:
+        return None
 
-    results: List[str] = []
-    for idx in chunk_ids:
-        data = redis_client.hget(key, str(idx))
-        if data:
-            results.append(data.decode())
+    return data, ttl
+
+
+async def load_cached_chunks(content_id: str, chunk_ids: List[int]) -> List[str]:
+    key = f"{CHUNKS_PREFIX}{content_id}"
+    if not chunk_ids:
+        return []
+
+    data = await get_redis_client().hmget(key, [str(idx) for idx in chunk_ids])
+    results = [chunk.decode() for chunk in data if chunk]
 
     logger.info(f"Finished loading chunks. Retrieved_count: {len(results)}")
     return results
 
 
-def has_cached_embeddings(session_id: str) -> bool:
-    key = f"{CHUNKS_PREFIX}{session_id}"
+async def load_cached_chunk_map(
+    content_id: str, chunk_ids: List[int]
+) -> Dict[int, str]:
+    if not chunk_ids:
+        return {}
 
-    return bool(redis_client.exists(key))
+    key = f"{CHUNKS_PREFIX}{content_id}"
+    data = await get_redis_client().hmget(key, [str(idx) for idx in chunk_ids])
+    return {idx: chunk.decode() for idx, chunk in zip(chunk_ids, data) if chunk}
 
 
-def cache_session_text(page_texts: List[str]) -> str:
-    session_id = uuid4().hex
-    key = f"{SESSION_PREFIX}{session_id}"
+async def load_chunk_metadata(
+    content_id: str, chunk_ids: List[int]
+) -> Dict[int, Dict[str, int]]:
+    if not chunk_ids:
+        return {}
+
+    key = f"{CHUNK_META_PREFIX}{content_id}"
+    data = await get_redis_client().hmget(key, [str(idx) for idx in chunk_ids])
+    return {idx: json.loads(meta) for idx, meta in zip(chunk_ids, data) if meta}
+
+
+async def has_cached_embeddings(content_id: str) -> bool:
+    chunks_key = f"{CHUNKS_PREFIX}{content_id}"
+    embeds_key = f"{EMBEDS_PREFIX}{content_id}"
+
+    return await get_redis_client().exists(chunks_key, embeds_key) == 2
 
-    logger.info(f"Creating new session cache entry for key: {key}")
+
+def new_session_id() -> str:
+    return uuid4().hex
+
+
+async def has_document_pages(content_id: str) -> bool:
+    return bool(await get_redis_client().exists(f"{PAGES_PREFIX}{content_id}"))
+
+
+async def stage_document_pages(content_id: str, page_texts: List[str]):
+    key = f"{PAGES_PREFIX}{content_id}{STAGING_SUFFIX}"
+    status_key = f"{STATUS_PREFIX}{content_id}"
+    if not page_texts:
+        return
+
+    logger.info(f"Appending {len(page_texts)} pages to staging entry {key}")
 
     try:
-        redis_client.setex(
-            name=key,
-            time=SESSION_TTL,
-            value=pickle.dumps(page_texts),
-        )
+        pipe = get_redis_client().pipeline(transaction=True)
+        pipe.rpush(key, *page_texts)
+        pipe.expire(key, SESSION_TTL)
+        pipe.hincrby(status_key, "pages_extracted", len(page_texts))
+        pipe.expire(status_key, SESSION_TTL)
+        await pipe.execute()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Could not create session: {e}",
         )
 
+
+async def reset_staged_pages(content_id: str):
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.delete(f"{PAGES_PREFIX}{content_id}{STAGING_SUFFIX}")
+    pipe.hset(f"{STATUS_PREFIX}{content_id}", "pages_extracted", 0)
+    await pipe.execute()
+
+
+async def publish_staged_pages(content_id: str):
+    key = f"{PAGES_PREFIX}{content_id}"
+
+    # Readers only ever see a fully extracted document
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.rename(f"{key}{STAGING_SUFFIX}", key)
+    pipe.expire(key, SESSION_TTL)
+    await pipe.execute()
+
+
+async def create_session(content_id: str) -> str:
+    session_id = new_session_id()
+    key = f"{SESSION_PREFIX}{session_id}"
+
+    logger.info(f"Creating new session cache entry {key} for document {content_id}")
+
+    # The content entry lives at least as long as its newest session
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.setex(key, SESSION_TTL, content_id)
+    for prefix in CONTENT_PREFIXES:
+        pipe.expire(f"{prefix}{content_id}", SESSION_TTL)
+    await pipe.execute()
+
     return session_id
+
+
+async def update_index_status(content_id: str, **fields: Any):
+    key = f"{STATUS_PREFIX}{content_id}"
+
+    pipe = get_redis_client().pipeline(transaction=True)
+    pipe.hset(key, mapping={name: str(value) for name, value in fields.items()})
+    pipe.expire(key, SESSION_TTL)
+    await pipe.execute()
+
+
+async def get_index_status(content_id: str) -> Dict[str, str]:
+    key = f"{STATUS_PREFIX}{content_id}"
+
+    data = await get_redis_client().hgetall(key)
+    return {name.decode(): value.decode() for name, value in data.items()}
+
+
+async def load_cached_answer(content_id: str, fingerprint: str) -> Optional[bytes]:
+    return await get_redis_client().get(f"{ANSWER_PREFIX}{content_id}:{fingerprint}")
+
+
+async def cache_answer(content_id: str, fingerprint: str, data: str):
+    key = f"{ANSWER_PREFIX}{content_id}:{fingerprint}"
+
+    await get_redis_client().setex(key, SESSION_TTL, data)
+    logger.info(f"Cached answer {key}")
+
+
+async def load_cached_answers(
+    content_id: str, fingerprints: List[str]
+) -> List[Optional[bytes]]:
+    if not fingerprints:
+        return []
+
+    return await get_redis_client().mget(
+        [f"{ANSWER_PREFIX}{content_id}:{fp}" for fp in fingerprints]
+    )
+
+
+async def cache_answers(content_id: str, answers: Dict[str, str]):
+    if not answers:
+        return
+
+    pipe = get_redis_client().pipeline(transaction=False)
+    for fingerprint, data in answers.items():
+        pipe.setex(f"{ANSWER_PREFIX}{content_id}:{fingerprint}", SESSION_TTL, data)
+    await pipe.execute()
+    logger.info(f"Cached {len(answers)} answers for document {content_id}")
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.internal.redis import get_redis_client
+from app.services.jobs import JobRegistry
+from redis.asyncio.lock import Lock
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+LOCK_PREFIX = "lock:"
+
+
+class SingleFlight:
+    def __init__(self, name: str, lease: float, poll_interval: float):
+        self.name = name
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._jobs = JobRegistry(name)
+
+    def in_flight(self, key: str) -> bool:
+        return self._jobs.get(key) is not None
+
+    def start(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[None]],
+        done: Callable[[], Awaitable[bool]],
+    ) -> asyncio.Task:
+        return self._jobs.start(key, lambda: self._run(key, fn, done))
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[None]],
+        done: Callable[[], Awaitable[bool]],
+    ) -> None:
+        await self._jobs.wait(key, lambda: self._run(key, fn, done))
+
+    async def _run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[None]],
+        done: Callable[[], Awaitable[bool]],
+    ) -> None:
+        lock = get_redis_client().lock(
+            f"{LOCK_PREFIX}{self.name}:{key}",
+            timeout=self.lease,
+            blocking=False,
+            thread_local=False,
+        )
+
+        waited = False
+        while not await done():
+            if await lock.acquire(blocking=False):
+                try:
+                    # Another worker may have finished between done() and acquire()
+                    if waited and await done():
+                        return
+                    async with self._renew_lease(lock):
+                        await fn()
+                finally:
+                    await self._release(lock)
+                return
+
+            if not waited:
+                logger.info(f"{self.name} for {key} runs in another worker, waiting")
+                waited = True
+            await asyncio.sleep(self.poll_interval)
+
+    @asynccontextmanager
+    async def _renew_lease(self, lock: Lock) -> AsyncIterator[None]:
+        async def renew():
+            while True:
+                await asyncio.sleep(self.lease / 3)
+                try:
+                    await lock.reacquire()
+                except LockError:
+                    logger.warning(f"{self.name} lost the lease on {lock.name}")
+                    return
+
+        renewer = asyncio.create_task(renew())
+        try:
+            yield
+        finally:
+            renewer.cancel()
+
+    async def _release(self, lock: Lock) -> None:
+        try:
+            await lock.release()
+        except LockError:
+            logger.warning(f"{self.name} lock {lock.name} expired before release")
@@ -1,12 +1,71 @@
+import asyncio
 import logging
 
-import fitz
+from app.internal.config import config
 from app.models.domain import DocumentSession
-from app.services.session import cache_session_text, get_session_text
+from app.services.extraction import (
+    iter_page_batches,
+    link_spooled_file,
+    remove_file,
+    spooled_upload,
+)
+from app.services.session import (
+    create_session,
+    get_session_text,
+    has_document_pages,
+    publish_staged_pages,
+    reset_staged_pages,
+    stage_document_pages,
+    update_index_status,
+)
+from app.services.singleflight import SingleFlight
 from fastapi import HTTPException, UploadFile, status
 
 logger = logging.getLogger(__name__)
 
+_EXTRACTION = SingleFlight(
+    "extraction",
+    lease=config.INDEX_LOCK_LEASE,
+    poll_interval=config.INDEX_LOCK_POLL_INTERVAL,
+)
+
+
+async def extract_document(content_id: str, path: str) -> None:
+    page_count = 0
+
+    # Drop whatever a crashed extraction left behind before appending pages
+    await reset_staged_pages(content_id)
+    try:
+        async for pages in iter_page_batches(path, config.PDF_PAGE_BATCH_SIZE):
+            await stage_document_pages(content_id, pages)
+            page_count += len(pages)
+    except Exception:
+        await reset_staged_pages(content_id)
+        raise
+
+    if page_count == 0:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="PDF does not contain any pages",
+        )
+
+    await publish_staged_pages(content_id)
+    await update_index_status(content_id, state="pending")
+    logger.info(f"Extracted document {content_id} with {page_count} pages")
+
+
+async def extract_shared(content_id: str, path: str) -> None:
+    # The job may outlive this request and serve other uploaders, so it reads
+    # from its own link that is only removed when the job ends
+    job_path = link_spooled_file(path)
+    job = _EXTRACTION.start(
+        content_id,
+        lambda: extract_document(content_id, job_path),
+        lambda: has_document_pages(content_id),
+    )
+    job.add_done_callback(lambda _: remove_file(job_path))
+    await asyncio.shield(job)
+
 
 async def create_document_session(upload_file: UploadFile) -> DocumentSession:
     logger.info(f"Starting session creation for uploaded file {upload_file.filename}")
@@ -18,18 +77,14 @@ async def create_document_session(upload_file: UploadFile) -> DocumentSession:
         )
 
     try:
-        pdf_bytes = await upload_file.read()
-    except Exception as e:
-        logger.exception("Error reading upload")
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to read PDF: {e}",
-        )
-
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        page_texts = [page.get_text() for page in doc]
-        doc.close()
+        async with spooled_upload(upload_file) as spooled:
+            content_id = spooled.sha256
+            if await has_document_pages(content_id):
+                logger.info(f"Reusing extracted text of document {content_id}")
+            else:
+                await extract_shared(content_id, spooled.path)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error extracting text from PDF")
         raise HTTPException(
@@ -37,8 +92,7 @@ async def create_document_session(upload_file: UploadFile) -> DocumentSession:
             detail=f"Failed to extract text: {e}",
         )
 
-    session_id = cache_session_text(page_texts)
-
-    logger.info(f"Created session {session_id} with {len(page_texts)} pages")
+    session_id = await create_session(content_id)
+    logger.info(f"Created session {session_id} for document {content_id}")
 
-    return get_session_text(session_id)
+    return await get_session_text(session_id)
@@ -23,3 +23,15 @@ def client() -> Generator:
 async def async_client(client) -> AsyncGenerator:
     async with AsyncClient(app=app, base_url=client.base_url) as ac:
         yield ac
+
+
+@pytest.fixture()
+def redis_mock(mocker):
+    client = mocker.AsyncMock()
+    client.pipeline = mocker.MagicMock()
+    client.pipeline.return_value.execute = mocker.AsyncMock()
+    client.lock = mocker.MagicMock(return_value=mocker.AsyncMock())
+    client.lock.return_value.acquire.return_value = True
+    mocker.patch("app.services.session.get_redis_client", return_value=client)
+    mocker.patch("app.services.singleflight.get_redis_client", return_value=client)
+    return client
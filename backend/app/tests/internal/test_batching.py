@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from app.internal.batching import MicroBatcher
+
+
+@pytest.mark.anyio
+async def test_concurrent_submits_are_batched_and_fanned_out():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test", double, max_batch_size=8, max_wait_ms=50)
+
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+    stats = batcher.stats.as_dict()
+    assert stats["batches"] == 1
+    assert stats["items"] == 5
+    assert stats["max_batch_size"] == 5
+
+
+@pytest.mark.anyio
+async def test_batches_are_capped_at_max_batch_size():
+    calls = []
+
+    def identity(items):
+        calls.append(len(items))
+        return items
+
+    batcher = MicroBatcher("test", identity, max_batch_size=2, max_wait_ms=50)
+
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert results == [0, 1, 2, 3, 4]
+    assert calls == [2, 2, 1]
+
+
+@pytest.mark.anyio
+async def test_batch_failure_is_raised_to_every_caller():
+    def boom(items):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher("test", boom, max_batch_size=4, max_wait_ms=10)
+
+    results = await asyncio.gather(
+        batcher.submit(1), batcher.submit(2), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
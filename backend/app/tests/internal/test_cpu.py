@@ -0,0 +1,104 @@
+import os
+
+import pytest
+from app.internal import cpu
+from app.internal.executor import InferenceExecutor
+from app.internal.metrics import collect_metrics
+
+
+@pytest.fixture
+def cpu_config(monkeypatch):
+    monkeypatch.setattr(cpu, "available_cores", lambda: 8)
+    monkeypatch.setattr(cpu.config, "PROCESS_WORKERS", 2)
+    monkeypatch.setattr(cpu.config, "INFERENCE_WORKERS", 2)
+    monkeypatch.setattr(cpu.config, "INTRA_OP_THREADS", None)
+    monkeypatch.setattr(cpu.config, "FAISS_OMP_THREADS", None)
+    monkeypatch.setattr(cpu.config, "TOKENIZERS_PARALLELISM", False)
+    for name in ("TOKENIZERS_PARALLELISM", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        monkeypatch.delenv(name, raising=False)
+    cpu.get_cpu_settings.cache_clear()
+    yield cpu.config
+    cpu.get_cpu_settings.cache_clear()
+
+
+def test_threads_split_cores_over_processes_and_workers(cpu_config):
+    settings = cpu.get_cpu_settings()
+
+    assert settings.intra_op_threads == 2
+    assert settings.faiss_threads == 2
+    assert settings.inter_op_threads == cpu_config.INTER_OP_THREADS
+
+
+def test_threads_never_drop_below_one(cpu_config):
+    cpu_config.INFERENCE_WORKERS = 16
+
+    assert cpu.get_cpu_settings().intra_op_threads == 1
+
+
+def test_explicit_threads_override_the_split(cpu_config):
+    cpu_config.INTRA_OP_THREADS = 3
+    cpu_config.FAISS_OMP_THREADS = 6
+
+    settings = cpu.get_cpu_settings()
+
+    assert settings.intra_op_threads == 3
+    assert settings.faiss_threads == 6
+
+
+def test_apply_sets_environment_and_metrics(cpu_config):
+    cpu.apply_cpu_settings()
+
+    assert os.environ["TOKENIZERS_PARALLELISM"] == "false"
+    assert os.environ["OMP_NUM_THREADS"] == "2"
+    assert collect_metrics()["cpu"]["intra_op_threads"] == 2
+
+
+@pytest.mark.parametrize(
+    "files, limit",
+    [
+        ({"v2": "150000 100000"}, 1.5),
+        ({"v2": "max 100000"}, None),
+        ({"quota": "200000", "period": "100000"}, 2.0),
+        ({"quota": "-1", "period": "100000"}, None),
+        ({}, None),
+    ],
+)
+def test_cgroup_cpu_limit(monkeypatch, tmp_path, files, limit):
+    for name, attr in (
+        ("v2", "CGROUP_V2_CPU_MAX"),
+        ("quota", "CGROUP_V1_CPU_QUOTA"),
+        ("period", "CGROUP_V1_CPU_PERIOD"),
+    ):
+        path = tmp_path / name
+        if name in files:
+            path.write_text(files[name] + "\n")
+        monkeypatch.setattr(cpu, attr, str(path))
+
+    assert cpu.cgroup_cpu_limit() == limit
+
+
+def test_available_cores_respects_the_cpu_quota(monkeypatch):
+    monkeypatch.setattr(cpu.os, "sched_getaffinity", lambda _: set(range(16)))
+    monkeypatch.setattr(cpu, "cgroup_cpu_limit", lambda: 2.5)
+    assert cpu.available_cores() == 2
+
+    monkeypatch.setattr(cpu, "cgroup_cpu_limit", lambda: 0.5)
+    assert cpu.available_cores() == 1
+
+    monkeypatch.setattr(cpu, "cgroup_cpu_limit", lambda: None)
+    assert cpu.available_cores() == 16
+
+
+@pytest.mark.anyio
+async def test_faiss_threads_apply_on_inference_threads(cpu_config):
+    cpu_config.FAISS_OMP_THREADS = 3
+    faiss = cpu.import_faiss()
+    executor = InferenceExecutor(
+        max_workers=1,
+        queue_size=0,
+        retry_after=1,
+        initializer=cpu.init_inference_thread,
+    )
+
+    assert await executor.run(faiss.omp_get_max_threads) == 3
+    executor.shutdown()
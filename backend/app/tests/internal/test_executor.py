@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+import pytest
+from app.internal.executor import InferenceExecutor
+from fastapi import HTTPException
+
+
+@pytest.mark.anyio
+async def test_run_returns_result_from_worker_thread():
+    executor = InferenceExecutor(max_workers=1, queue_size=0, retry_after=1)
+
+    def add(a, b):
+        return a + b, threading.current_thread().name
+
+    total, thread_name = await executor.run(add, 1, 2)
+
+    assert total == 3
+    assert thread_name.startswith("inference")
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_run_rejects_when_queue_full():
+    executor = InferenceExecutor(max_workers=1, queue_size=1, retry_after=7)
+    release = threading.Event()
+
+    tasks = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc:
+        await executor.run(release.wait)
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "7"
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_run_when_free_waits_for_a_slot():
+    executor = InferenceExecutor(max_workers=1, queue_size=0, retry_after=1)
+    release = threading.Event()
+
+    busy = asyncio.ensure_future(executor.run(release.wait))
+    await asyncio.sleep(0)
+    waiting = asyncio.ensure_future(executor.run_when_free(lambda: "done"))
+    await asyncio.sleep(0.1)
+
+    assert not waiting.done()
+    release.set()
+    assert await waiting == "done"
+    await busy
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_run_propagates_exceptions():
+    executor = InferenceExecutor(max_workers=1, queue_size=0, retry_after=1)
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.run(boom)
+
+    assert executor.pending == 0
+    executor.shutdown()
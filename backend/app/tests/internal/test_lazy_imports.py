@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[3]
+
+CHECK = """
+import sys
+import app.main
+heavy = ("torch", "transformers", "sentence_transformers", "faiss")
+print("heavy:" + ",".join(name for name in heavy if name in sys.modules))
+"""
+
+
+def test_app_import_does_not_load_ml_libraries():
+    proc = subprocess.run(
+        [sys.executable, "-c", CHECK],
+        cwd=BACKEND,
+        env={**os.environ, "ENV_STATE": "test"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert proc.stdout.splitlines()[-1] == "heavy:"
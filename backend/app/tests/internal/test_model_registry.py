@@ -0,0 +1,48 @@
+import time
+
+import pytest
+from app.internal.model_registry import ModelRegistry
+
+
+@pytest.mark.anyio
+async def test_models_load_in_parallel_and_report_timings():
+    registry = ModelRegistry(eager=True)
+    warmed = []
+    for name in ("a", "b", "c"):
+        registry.register(
+            name,
+            load=lambda: time.sleep(0.2),
+            warmup=lambda name=name: warmed.append(name),
+        )
+    assert not registry.ready()
+
+    started = time.perf_counter()
+    await registry.load_all()
+
+    assert time.perf_counter() - started < 0.5
+    assert registry.ready()
+    assert sorted(warmed) == ["a", "b", "c"]
+    stats = registry.stats()
+    assert stats["a"]["state"] == "ready"
+    assert stats["a"]["load_ms"] >= 200
+    assert stats["a"]["warmup_ms"] is not None
+
+
+@pytest.mark.anyio
+async def test_failed_model_is_reported():
+    registry = ModelRegistry(eager=True)
+    registry.register("ok", load=lambda: None, warmup=lambda: None)
+    registry.register("broken", load=lambda: 1 / 0, warmup=lambda: None)
+
+    await registry.load_all()
+
+    assert registry.failed()
+    assert not registry.ready()
+    assert registry.stats()["broken"]["error"] == "division by zero"
+
+
+def test_lazy_registry_is_always_ready():
+    registry = ModelRegistry(eager=False)
+    registry.register("a", load=lambda: None, warmup=lambda: None)
+
+    assert registry.ready()
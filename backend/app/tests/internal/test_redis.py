@@ -0,0 +1,27 @@
+import pytest
+from app.internal import redis as redis_internal
+
+
+@pytest.mark.anyio
+async def test_init_and_close_redis_manage_the_client():
+    with pytest.raises(RuntimeError):
+        redis_internal.get_redis_client()
+
+    client = await redis_internal.init_redis()
+    assert redis_internal.get_redis_client() is client
+
+    pool = client.connection_pool
+    assert isinstance(pool, redis_internal.InstrumentedConnectionPool)
+    assert pool.stats() == {
+        "max_connections": redis_internal.config.REDIS_MAX_CONNECTIONS,
+        "in_use": 0,
+        "available": 0,
+        "waiting": 0,
+    }
+    assert pool.connection_kwargs["health_check_interval"] == (
+        redis_internal.config.REDIS_HEALTH_CHECK_INTERVAL
+    )
+
+    await redis_internal.close_redis()
+    with pytest.raises(RuntimeError):
+        redis_internal.get_redis_client()
@@ -0,0 +1,57 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+from app.internal.config import config
+from app.pipelines import backends
+
+
+class FakeORTModel:
+    calls = []
+
+    @classmethod
+    def from_pretrained(cls, path, **kwargs):
+        cls.calls.append((str(path), kwargs))
+        return cls()
+
+    def save_pretrained(self, path):
+        path.mkdir(parents=True)
+        (path / "model.onnx").write_bytes(b"onnx")
+
+
+@pytest.fixture()
+def fake_optimum(mocker, tmp_path):
+    FakeORTModel.calls = []
+    mocker.patch.object(config, "ONNX_CACHE_DIR", str(tmp_path))
+    mocker.patch.object(
+        backends,
+        "_import_optimum",
+        return_value=SimpleNamespace(ORTModelForQuestionAnswering=FakeORTModel),
+    )
+    return tmp_path
+
+
+def test_model_backend_overrides_the_global_backend(mocker):
+    mocker.patch.object(config, "INFERENCE_BACKEND", "onnx")
+
+    assert backends.resolve_backend(None) == "onnx"
+    assert backends.resolve_backend("onnx-int8") == "onnx-int8"
+
+
+def test_onnx_export_happens_once(fake_optimum):
+    for _ in range(2):
+        model = backends.load_transformers_model(
+            "question-answering", "org/model", "onnx"
+        )
+
+    assert isinstance(model, FakeORTModel)
+    exports = [c for c in FakeORTModel.calls if c[1].get("export")]
+    assert exports == [("org/model", {"export": True})]
+    assert (fake_optimum / "org--model" / "onnx" / "model.onnx").exists()
+
+
+def test_onnx_backend_without_optimum_is_reported(mocker):
+    mocker.patch.dict(sys.modules, {"optimum.onnxruntime": None})
+
+    with pytest.raises(RuntimeError, match="requirements-onnx.txt"):
+        backends.load_transformers_model("question-answering", "org/model", "onnx")
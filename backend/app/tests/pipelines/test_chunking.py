@@ -0,0 +1,83 @@
+import pytest
+from app.pipelines.chunking import chunk_document, document_text, split_paragraphs
+from transformers import BertTokenizerFast
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta".split()
+
+
+@pytest.fixture()
+def tokenizer(tmp_path):
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + WORDS))
+    return BertTokenizerFast(vocab_file=str(vocab))
+
+
+def test_paragraph_offsets_point_into_the_document_text():
+    pages = ["  alpha beta\n\n\n gamma  ", "delta\n \nepsilon"]
+    text = document_text(pages)
+
+    paragraphs = split_paragraphs(pages)
+
+    assert [(page, text[start:end]) for page, start, end in paragraphs] == [
+        (0, "alpha beta"),
+        (0, "gamma"),
+        (1, "delta"),
+        (1, "epsilon"),
+    ]
+
+
+def test_small_paragraphs_are_packed_up_to_the_budget(tokenizer):
+    pages = ["alpha beta\n\ngamma", "delta epsilon\n\nzeta eta theta"]
+    text = document_text(pages)
+
+    chunks = chunk_document(pages, tokenizer, max_tokens=4)
+
+    assert [c.text for c in chunks] == [
+        "alpha beta\n\ngamma",
+        "delta epsilon",
+        "zeta eta theta",
+    ]
+    assert [c.tokens for c in chunks] == [3, 2, 3]
+    assert [(c.page_start, c.page_end) for c in chunks] == [(0, 0), (1, 1), (1, 1)]
+    assert all(text[c.char_start : c.char_end] == c.text for c in chunks)
+
+
+def test_chunks_overlap_by_trailing_paragraphs(tokenizer):
+    pages = ["alpha beta\n\ngamma\n\ndelta epsilon\n\nzeta"]
+
+    chunks = chunk_document(pages, tokenizer, max_tokens=4, overlap_tokens=1)
+
+    assert [c.text for c in chunks] == [
+        "alpha beta\n\ngamma",
+        "gamma\n\ndelta epsilon\n\nzeta",
+    ]
+
+
+def test_overlap_cuts_into_paragraphs_longer_than_the_overlap(tokenizer):
+    first = " ".join(WORDS[:4])
+    second = " ".join(WORDS[4:])
+    pages = [f"{first}\n\n{second}"]
+
+    chunks = chunk_document(pages, tokenizer, max_tokens=6, overlap_tokens=2)
+
+    assert [c.text for c in chunks] == [first, f"gamma delta\n\n{second}"]
+    assert [c.tokens for c in chunks] == [4, 6]
+    assert chunks[1].char_start < chunks[0].char_end
+
+
+def test_long_paragraphs_are_split_into_overlapping_windows(tokenizer):
+    pages = [" ".join(WORDS)]
+
+    chunks = chunk_document(pages, tokenizer, max_tokens=4, overlap_tokens=1)
+
+    assert [c.text for c in chunks] == [
+        "alpha beta gamma delta",
+        "delta epsilon zeta eta",
+        "eta theta",
+    ]
+    assert max(c.tokens for c in chunks) == 4
+
+
+def test_overlap_must_stay_below_the_budget(tokenizer):
+    with pytest.raises(ValueError):
+        chunk_document(["alpha"], tokenizer, max_tokens=2, overlap_tokens=2)
@@ -0,0 +1,39 @@
+import pytest
+from app.pipelines import ner
+
+
+@pytest.fixture()
+def fake_ner(mocker):
+    calls = []
+
+    def run(texts, batch_size):
+        calls.append(list(texts))
+        return [
+            [{"word": word, "entity_group": "LOC", "score": 0.9}]
+            for word in (text.split()[0] for text in texts)
+        ]
+
+    mocker.patch.object(ner, "get_ner_pipeline", return_value=run)
+    mocker.patch.object(ner, "_ENTITY_CACHE", ner.TTLCache(maxsize=8))
+    return calls
+
+
+def test_answers_are_tagged_in_one_batch(fake_ner):
+    qa_entities, rag_entities = ner.extract_entities(["Paris is big", "Rome too"])
+
+    assert fake_ner == [["Paris is big", "Rome too"]]
+    assert [e.entity for e in qa_entities] == ["Paris"]
+    assert [e.entity for e in rag_entities] == ["Rome"]
+
+
+def test_identical_and_repeated_answers_are_memoized(fake_ner):
+    first = ner.extract_entities(["Paris", "Paris"])
+    second = ner.extract_entities(["Paris", "Rome"])
+
+    assert fake_ner == [["Paris"], ["Rome"]]
+    assert first[0] == first[1] == second[0]
+
+
+def test_empty_answers_skip_the_model(fake_ner):
+    assert ner.extract_entities(["", ""]) == [[], []]
+    assert fake_ner == []
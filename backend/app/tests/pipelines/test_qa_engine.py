@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from app.internal.config import config
+from app.models.ask import SingleModelAnswer
+from app.pipelines import qa_engine
+from transformers import (
+    BertTokenizerFast,
+    DistilBertConfig,
+    DistilBertForQuestionAnswering,
+)
+
+WORDS = "the cat sat on a mat in paris where is who what".split()
+
+
+@pytest.fixture()
+def tiny_model(mocker, tmp_path):
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + WORDS))
+    tokenizer = BertTokenizerFast(vocab_file=str(vocab))
+    model = DistilBertForQuestionAnswering(
+        DistilBertConfig(
+            vocab_size=len(WORDS) + 4, dim=16, hidden_dim=32, n_layers=1, n_heads=2
+        )
+    ).eval()
+    tokenizer.model_input_names = ["input_ids", "attention_mask"]
+
+    mocker.patch.object(qa_engine, "get_qa_model", return_value=(tokenizer, model))
+    model.tokenizer = tokenizer
+    mocker.patch.object(config, "QA_WINDOW_SIZE", 16)
+    mocker.patch.object(config, "QA_WINDOW_STRIDE", 4)
+    mocker.patch.object(config, "QA_MAX_QUESTION_TOKENS", 4)
+    mocker.patch.object(config, "QA_WINDOW_BATCH_SIZE", 2)
+    return model
+
+
+def test_best_span_stays_in_context_and_answer_length():
+    start = np.array([9.0, 0.0, 5.0, 0.0, 0.0])
+    end = np.array([9.0, 0.0, 0.0, 0.0, 5.0])
+    mask = np.array([False, True, True, True, True])
+
+    s, e, score = qa_engine.best_span(start, end, mask, max_answer_len=3)
+    assert (s, e) == (2, 4)
+    assert 0.9 < score <= 1.0
+
+    s, e, _ = qa_engine.best_span(start, end, mask, max_answer_len=2)
+    assert s == 2 and e - s < 2
+
+
+def test_windows_are_capped_by_the_budget(tiny_model, mocker):
+    mocker.patch.object(config, "QA_MAX_WINDOWS", 3)
+    forward = mocker.spy(tiny_model, "forward")
+    context = " ".join(WORDS * 20)
+
+    windows = qa_engine.tokenize_document(context)
+    answer, score, timings = qa_engine.answer_full_context("where is the cat", windows)
+
+    assert answer in context
+    assert 0.0 <= score <= 1.0
+    assert timings.windows_total > 3
+    assert timings.windows == 3
+    assert [c.kwargs["input_ids"].shape[0] for c in forward.call_args_list] == [2, 1]
+    assert timings.tokenize_ms > 0 and timings.forward_ms > 0
+
+
+def test_early_exit_skips_remaining_windows(tiny_model, mocker):
+    mocker.patch.object(config, "QA_MAX_WINDOWS", 10)
+    mocker.patch.object(config, "QA_EARLY_EXIT_SCORE", 0.0)
+    context = " ".join(WORDS * 20)
+
+    windows = qa_engine.tokenize_document(context)
+    _, _, timings = qa_engine.answer_full_context("where is the cat", windows)
+
+    assert timings.early_exit
+    assert timings.windows == 2
+
+
+def test_empty_context_has_no_answer(tiny_model):
+    windows = qa_engine.tokenize_document("  ")
+    assert qa_engine.answer_full_context("who", windows)[:2] == ("", 0.0)
+
+
+def test_windows_overlap_by_the_stride(tiny_model):
+    context = " ".join(WORDS * 2)
+
+    windows = qa_engine.tokenize_document(context)
+
+    assert qa_engine.window_tokens() == 9
+    assert windows.windows_total == len(windows.lengths) == 4
+    assert list(windows.lengths) == [9, 9, 9, 9]
+    assert list(windows.ids[1, :4]) == list(windows.ids[0, 5:])
+    first, last = windows.offsets[0, 0, 0], windows.offsets[-1, -1, 1]
+    assert context[first:last] == context
+
+
+def test_spliced_window_matches_pair_encoding(tiny_model):
+    tokenizer = tiny_model.tokenizer
+    context = "the cat sat on a mat in paris"
+    windows = qa_engine.tokenize_document(context)
+    question_ids = tokenizer("where is the cat", add_special_tokens=False)["input_ids"]
+
+    inputs, first = qa_engine.splice_question(question_ids, windows, 0, 1)
+
+    expected = tokenizer("where is the cat", context)["input_ids"]
+    assert first == len(question_ids) + 2
+    assert list(inputs["input_ids"][0, : len(expected)]) == expected
+    assert inputs["attention_mask"][0].sum() == len(expected)
+
+
+def test_timings_are_exposed_on_the_answer():
+    timings = qa_engine.QATimings(windows=1, windows_total=1)
+
+    answer = SingleModelAnswer(
+        model_name="m",
+        description="d",
+        answer="",
+        score=0.0,
+        entities=[],
+        timings=timings,
+    )
+
+    assert answer.timings.windows == 1
+
+
+def test_questions_share_forward_passes_and_match_single_answers(tiny_model, mocker):
+    mocker.patch.object(config, "QA_MAX_WINDOWS", 3)
+    context = " ".join(WORDS * 20)
+    windows = qa_engine.tokenize_document(context)
+    questions = ["where is the cat", "who sat"]
+    single = [qa_engine.answer_full_context(q, windows) for q in questions]
+
+    forward = mocker.spy(tiny_model, "forward")
+    batched = qa_engine.answer_questions(questions, windows)
+
+    assert [c.kwargs["input_ids"].shape[0] for c in forward.call_args_list] == [2] * 3
+    for (answer, score, timings), (expected, expected_score, _) in zip(batched, single):
+        assert answer == expected
+        assert score == pytest.approx(expected_score, abs=1e-5)
+        assert timings.windows == 3
+
+
+def test_document_and_questions_tokenize_concurrently(tiny_model):
+    context = " ".join(WORDS * 20_000)
+    windows = qa_engine.tokenize_document("the cat sat on a mat")
+
+    def tokenize_documents():
+        for _ in range(3):
+            qa_engine.tokenize_document(context)
+
+    def answer():
+        for _ in range(200):
+            qa_engine.answer_full_context("where is the cat sat", windows)
+
+    # One shared tokenizer raises "Already borrowed" here
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(tokenize_documents), pool.submit(answer)]
+        for future in futures:
+            future.result()
+
+
+def test_each_thread_tokenizes_with_its_own_copy(tiny_model):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        copies = list(pool.map(lambda _: qa_engine.get_qa_tokenizer(), range(2)))
+        copies += [qa_engine.get_qa_tokenizer()]
+
+    assert all(t is not tiny_model.tokenizer for t in copies)
+    assert qa_engine.get_qa_tokenizer() is copies[-1]
@@ -0,0 +1,52 @@
+import pytest
+from app.pipelines import qa
+from app.pipelines.qa_engine import QATimings
+
+
+@pytest.fixture()
+def window_mocks(mocker):
+    qa._WINDOW_CACHE.clear()
+    mocker.patch.object(qa, "resolve_content_id", return_value="doc")
+    pages = mocker.patch.object(qa, "get_document_pages", return_value=["p1", "p2"])
+    tokenize = mocker.patch.object(qa, "tokenize_document", return_value="windows")
+    answer = mocker.patch.object(
+        qa,
+        "answer_full_context",
+        side_effect=lambda question, windows: ("a", 0.5, QATimings(tokenize_ms=1.0)),
+    )
+    yield pages, tokenize, answer
+    qa._WINDOW_CACHE.clear()
+
+
+@pytest.mark.anyio
+async def test_document_is_tokenized_once_per_content(window_mocks):
+    pages, tokenize, answer = window_mocks
+
+    _, _, first = await qa.run_qa_pipeline("sess1", "who?")
+    _, _, second = await qa.run_qa_pipeline("sess2", "what?")
+
+    pages.assert_awaited_once_with("doc")
+    tokenize.assert_called_once_with("p1\n\np2")
+    assert [c.args for c in answer.call_args_list] == [
+        ("who?", "windows"),
+        ("what?", "windows"),
+    ]
+    assert not first.windows_cached
+    assert second.windows_cached
+    assert qa._WINDOW_CACHE.stats()["hits"] == 1
+
+
+def test_rag_pipeline_reuses_the_engine_model(mocker):
+    qa.get_qa_pipeline.cache_clear()
+    tokenizer = {"vocab": ["the"]}
+    mocker.patch.object(qa, "get_qa_model", return_value=(tokenizer, "model"))
+    pipeline = mocker.patch("transformers.pipeline")
+
+    qa.get_qa_pipeline()
+
+    pipeline.assert_called_once()
+    assert pipeline.call_args.kwargs["model"] == "model"
+    # Same settings, but a tokenizer of its own
+    assert pipeline.call_args.kwargs["tokenizer"] == tokenizer
+    assert pipeline.call_args.kwargs["tokenizer"] is not tokenizer
+    qa.get_qa_pipeline.cache_clear()
@@ -0,0 +1,189 @@
+import numpy as np
+import pytest
+from app.internal.config import config
+from app.pipelines import rag
+from app.services.index_format import decode_index, encode_index
+
+
+@pytest.fixture(autouse=True)
+def clear_index_cache():
+    rag._INDEX_CACHE.clear()
+    yield
+    rag._INDEX_CACHE.clear()
+
+
+# all-MiniLM-L6-v2's dimension, without loading the model
+EMBED_DIM = 384
+
+FLAT_PARAMS = rag.IndexParams(kind=rag.FLAT, factory="Flat", chunks=10)
+
+
+def make_embeddings(n: int = 10) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((n, EMBED_DIM), dtype=np.float32)
+
+
+def test_index_round_trips_through_serialization():
+    embeddings = make_embeddings()
+    idx = rag.build_faiss_index(embeddings)
+
+    restored = rag.deserialize_faiss_index(rag.serialize_faiss_index(idx, FLAT_PARAMS))
+
+    assert restored.ntotal == idx.ntotal
+    _, ids = restored.search(embeddings[:1], 1)
+    assert ids[0][0] == 0
+
+
+@pytest.mark.anyio
+async def test_get_document_index_builds_once_and_reuses(mocker):
+    embeddings = make_embeddings()
+
+    mocker.patch.object(rag, "load_cached_index", return_value=None)
+    load_embeddings = mocker.patch.object(
+        rag, "load_cached_embeddings", return_value=embeddings
+    )
+    cache_index = mocker.patch.object(rag, "cache_faiss_index")
+
+    first = await rag.get_document_index("sess")
+    second = await rag.get_document_index("sess")
+
+    assert first is second
+    assert first.ntotal == len(embeddings)
+    load_embeddings.assert_awaited_once_with("sess")
+    cache_index.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_get_document_index_loads_serialized_index(mocker):
+    idx = rag.build_faiss_index(make_embeddings())
+    mocker.patch.object(
+        rag,
+        "load_cached_index",
+        return_value=(
+            rag.serialize_faiss_index(idx, FLAT_PARAMS),
+            100,
+        ),
+    )
+    load_embeddings = mocker.patch.object(rag, "load_cached_embeddings")
+
+    restored = await rag.get_document_index("other")
+
+    assert restored.ntotal == idx.ntotal
+    load_embeddings.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_retrieve_chunks_skips_missing_ids(mocker):
+    embeddings = make_embeddings(2)
+    rag._INDEX_CACHE.set("sess", rag.build_faiss_index(embeddings))
+    load_chunks = mocker.patch.object(
+        rag, "load_cached_chunks", return_value=["a", "b"]
+    )
+
+    await rag.retrieve_chunks("sess", embeddings[:1], k=5)
+
+    chunk_ids = load_chunks.call_args.args[1]
+    assert sorted(chunk_ids) == [0, 1]
+
+
+@pytest.mark.anyio
+async def test_batch_retrieval_loads_chunks_once_per_batch(mocker):
+    embeddings = make_embeddings(3)
+    rag._INDEX_CACHE.set("doc", rag.build_faiss_index(embeddings))
+    load_chunks = mocker.patch.object(
+        rag,
+        "load_cached_chunk_map",
+        side_effect=lambda _, ids: {i: f"chunk{i}" for i in ids if i != 2},
+    )
+
+    retrieved = await rag.retrieve_chunks_batch("doc", embeddings[[1, 0]], k=3)
+
+    load_chunks.assert_awaited_once()
+    assert load_chunks.call_args.args[1] == [0, 1, 2]
+    assert [chunks[0] for chunks in retrieved] == ["chunk1", "chunk0"]
+    assert all("chunk2" not in chunks for chunks in retrieved)
+
+
+def test_index_kind_follows_chunk_count_and_override(mocker):
+    mocker.patch.object(config, "FAISS_HNSW_MIN_CHUNKS", 1_000)
+    mocker.patch.object(config, "FAISS_IVFPQ_MIN_CHUNKS", 10_000)
+
+    assert rag.choose_index_params(999, 384).kind == rag.FLAT
+    assert rag.choose_index_params(1_000, 384).factory == "HNSW32"
+    ivfpq = rag.choose_index_params(80_000, 384)
+    assert ivfpq.factory == "IVF512,PQ48x8"
+    assert ivfpq.trained_on == config.FAISS_IVF_MAX_TRAIN_POINTS
+
+    mocker.patch.object(config, "FAISS_INDEX_TYPE", "ivfpq")
+    mocker.patch.object(config, "FAISS_PQ_M", 50)
+    assert rag.choose_index_params(4_000, 384).factory == "IVF102,PQ48x8"
+    assert rag.choose_index_params(100, 384).kind == rag.FLAT
+
+
+@pytest.mark.parametrize("chunks", [100_000, 400_000, 1_000_000])
+def test_ivf_lists_get_enough_training_points_at_default_settings(chunks):
+    params = rag.choose_index_params(chunks, 384)
+    nlist = int(params.factory.split(",")[0].removeprefix("IVF"))
+
+    assert params.kind == rag.IVFPQ
+    assert params.trained_on / nlist >= rag.IVF_POINTS_PER_LIST
+
+
+def test_larger_training_sample_allows_more_ivf_lists(mocker):
+    mocker.patch.object(config, "FAISS_IVF_MAX_TRAIN_POINTS", 100_000)
+
+    assert rag.choose_index_params(100_000, 384).factory == "IVF1264,PQ48x8"
+
+
+@pytest.mark.parametrize("kind", ["hnsw", "ivfpq"])
+def test_approximate_indexes_persist_their_params(mocker, kind):
+    mocker.patch.object(config, "FAISS_INDEX_TYPE", kind)
+    mocker.patch.object(config, "FAISS_IVF_NPROBE", 4)
+    # One sub-quantizer keeps PQ training fast
+    mocker.patch.object(config, "FAISS_PQ_M", 1)
+    embeddings = make_embeddings(300)
+
+    idx, data = rag.build_serialized_faiss_index(embeddings)
+    restored = rag.deserialize_faiss_index(data)
+
+    _, params = decode_index(data)
+    assert params["kind"] == kind
+    assert params["chunks"] == 300
+    assert restored.ntotal == idx.ntotal
+    if kind == "ivfpq":
+        assert params["trained_on"] == 300
+        assert rag.import_faiss().extract_index_ivf(restored).nprobe == 4
+    _, ids = restored.search(embeddings[:5], 5)
+    assert (ids[:, 0] >= 0).all()
+
+
+@pytest.mark.parametrize("header", ["none", "l2"])
+@pytest.mark.anyio
+async def test_stale_serialized_index_is_rebuilt(mocker, header):
+    embeddings = make_embeddings()
+    idx = rag.build_faiss_index(embeddings, FLAT_PARAMS)
+    data = rag.import_faiss().serialize_index(idx).tobytes()
+    if header == "l2":
+        data = encode_index(data, {**FLAT_PARAMS.as_dict(), "metric": "l2"})
+    mocker.patch.object(rag, "load_cached_index", return_value=(data, 100))
+    load_embeddings = mocker.patch.object(
+        rag, "load_cached_embeddings", return_value=embeddings
+    )
+    cache_index = mocker.patch.object(rag, "cache_faiss_index")
+
+    assert rag.deserialize_faiss_index(data) is None
+    rebuilt = await rag.get_document_index("doc")
+
+    assert rebuilt.ntotal == len(embeddings)
+    load_embeddings.assert_awaited_once_with("doc")
+    cache_index.assert_awaited_once()
+
+
+def test_search_ranks_by_cosine_similarity():
+    embeddings = make_embeddings()
+    embeddings *= np.linspace(0.1, 10, len(embeddings), dtype=np.float32)[:, None]
+    idx = rag.build_faiss_index(embeddings)
+
+    _, ids = idx.search(embeddings[3:4] / np.linalg.norm(embeddings[3]), 1)
+
+    assert ids[0][0] == 3
@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from app.internal.config import config
+from app.pipelines import rag
+from app.pipelines.chunking import Chunk
+
+EMBED_DIM = 8
+
+
+@pytest.fixture()
+def indexing_mocks(mocker, redis_mock):
+    statuses = []
+    mocker.patch.object(rag, "embed_dim", return_value=EMBED_DIM)
+
+    async def record_status(content_id, **fields):
+        statuses.append(fields)
+
+    mocker.patch.object(rag, "update_index_status", side_effect=record_status)
+    mocker.patch.object(rag, "get_document_pages", return_value=["one\n\ntwo\n\nthree"])
+    mocker.patch.object(
+        rag,
+        "chunk_pages",
+        side_effect=lambda pages: [
+            Chunk(text=t, page_start=0, page_end=0, char_start=0, char_end=0, tokens=1)
+            for t in pages[0].split("\n\n")
+        ],
+    )
+    mocker.patch.object(rag, "has_cached_embeddings", return_value=False)
+    mocker.patch.object(
+        rag,
+        "embed_chunks",
+        side_effect=lambda chunks: np.ones((len(chunks), EMBED_DIM), np.float32),
+    )
+    cache = mocker.patch.object(rag, "cache_chunks_and_embeddings")
+    index = mocker.patch.object(rag, "index_document_embeddings")
+    mocker.patch.object(config, "EMBED_BATCH_SIZE", 2)
+    return statuses, cache, index
+
+
+@pytest.mark.anyio
+async def test_index_document_reports_progress(indexing_mocks):
+    statuses, cache, index = indexing_mocks
+
+    await rag.index_document("doc")
+
+    assert statuses[0]["state"] == "running"
+    assert {"chunks_total": 3, "chunks_embedded": 0} in statuses
+    assert [s["chunks_embedded"] for s in statuses if "chunks_embedded" in s] == [
+        0,
+        2,
+        3,
+    ]
+    assert statuses[-1] == {"state": "ready"}
+
+    _, chunks, embeddings, model_name = cache.call_args.args
+    assert chunks == ["one", "two", "three"]
+    assert cache.call_args.kwargs["metadata"][0]["tokens"] == 1
+    assert embeddings.shape == (3, EMBED_DIM)
+    assert model_name == rag.MODEL_NAME
+    index.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_chunks_are_embedded_shortest_first(indexing_mocks, mocker):
+    _, cache, _ = indexing_mocks
+    mocker.patch.object(rag, "get_document_pages", return_value=["three\n\none\n\ntwo"])
+    embed = mocker.patch.object(
+        rag,
+        "embed_chunks",
+        side_effect=lambda chunks: np.array(
+            [[len(c)] * EMBED_DIM for c in chunks], np.float32
+        ),
+    )
+
+    await rag.index_document("doc")
+
+    assert [c.args[0] for c in embed.call_args_list] == [["one", "two"], ["three"]]
+    embeddings = cache.call_args.args[2]
+    np.testing.assert_array_equal(embeddings[:, 0], [5, 3, 3])
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_one_indexing_job(indexing_mocks):
+    _, cache, _ = indexing_mocks
+
+    rag.schedule_document_indexing("doc")
+    await asyncio.gather(
+        rag.ensure_document_indexed("doc"), rag.ensure_document_indexed("doc")
+    )
+
+    cache.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_failed_indexing_is_reported(indexing_mocks, mocker):
+    statuses, _, _ = indexing_mocks
+    mocker.patch.object(rag, "embed_chunks", side_effect=RuntimeError("oom"))
+
+    with pytest.raises(RuntimeError):
+        await rag.ensure_document_indexed("doc")
+
+    assert statuses[-1] == {"state": "failed", "error": "oom"}
+
+
+def test_chunking_uses_its_own_tokenizer(mocker):
+    rag.get_chunk_tokenizer.cache_clear()
+    tokenizer = {"vocab": ["the"]}
+    mocker.patch.object(
+        rag, "get_embedder", return_value=SimpleNamespace(tokenizer=tokenizer)
+    )
+
+    chunk_tokenizer = rag.get_chunk_tokenizer()
+
+    assert chunk_tokenizer == tokenizer
+    assert chunk_tokenizer is not tokenizer
+    rag.get_chunk_tokenizer.cache_clear()
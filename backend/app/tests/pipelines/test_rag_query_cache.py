@@ -0,0 +1,40 @@
+import asyncio
+
+import numpy as np
+import pytest
+from app.pipelines import rag
+
+
+@pytest.fixture()
+def encode(mocker):
+    rag._QUERY_CACHE.clear()
+    encode = mocker.patch.object(
+        rag,
+        "embed_questions",
+        side_effect=lambda questions: np.array(
+            [[len(q), 1.0] for q in questions], np.float32
+        ),
+    )
+    yield encode
+    rag._QUERY_CACHE.clear()
+
+
+@pytest.mark.anyio
+async def test_concurrent_queries_share_one_encode_call(encode):
+    first, second = await asyncio.gather(
+        rag.embed_query("who?"), rag.embed_query("what is it?")
+    )
+
+    encode.assert_called_once_with(["who?", "what is it?"])
+    np.testing.assert_array_equal(first, [4, 1])
+    np.testing.assert_array_equal(second, [11, 1])
+
+
+@pytest.mark.anyio
+async def test_query_embeddings_are_cached_by_normalized_text(encode):
+    await rag.embed_query("Who wrote  it?")
+    embeddings = await rag.embed_queries(["who wrote it?", " WHO WROTE IT? "])
+
+    encode.assert_called_once_with(["who wrote it?"])
+    assert embeddings.shape == (2, 2)
+    assert rag._QUERY_CACHE.stats()["hits"] == 2
@@ -1,5 +1,7 @@
 import pytest
+from app.internal.auth import create_session_token
 from app.main import app
+from app.models.ask import BatchAskResponse, MultiAskResponse
 from fastapi.testclient import TestClient
 
 
@@ -30,3 +32,83 @@ def test_ask_empty_question(client):
     )
 
     assert response.status_code in (404, 422, 401)
+
+
+def test_ask_reports_answer_cache_status(client, mocker):
+    answer = mocker.patch(
+        "app.routers.ask.answer_question",
+        return_value=(MultiAskResponse(results=[]), "HIT"),
+    )
+
+    response = client.post(
+        "/ask",
+        data={"question": "What is this?"},
+        headers={
+            "Authorization": f"Bearer {create_session_token('sess1')}",
+            "X-Cache-Bypass": "true",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["X-Answer-Cache"] == "HIT"
+    answer.assert_awaited_once_with(
+        "sess1", "What is this?", include_entities=True, bypass_cache=True
+    )
+
+
+def test_ask_batch_returns_results_in_order(client, mocker):
+    answer = mocker.patch(
+        "app.routers.ask.answer_questions",
+        return_value=(
+            BatchAskResponse(results=[MultiAskResponse(results=[])] * 2),
+            ["HIT", "MISS"],
+        ),
+    )
+
+    response = client.post(
+        "/ask/batch",
+        json={"questions": ["What is this?", "Who wrote it?"]},
+        headers={"Authorization": f"Bearer {create_session_token('sess1')}"},
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
+    assert response.headers["X-Answer-Cache"] == "HIT,MISS"
+    answer.assert_awaited_once_with(
+        "sess1",
+        ["What is this?", "Who wrote it?"],
+        include_entities=True,
+        bypass_cache=False,
+    )
+
+
+def test_ask_batch_requires_a_question(client):
+    response = client.post(
+        "/ask/batch",
+        json={"questions": []},
+        headers={"Authorization": f"Bearer {create_session_token('sess1')}"},
+    )
+
+    assert response.status_code == 422
+
+
+def test_ask_stream_sends_server_sent_events(client, mocker):
+    async def events():
+        yield "answer", {"index": 0, "answer": "cats"}
+        yield "done", {"cache": "MISS"}
+
+    mocker.patch("app.routers.ask.stream_answers", return_value=(events(), "MISS"))
+
+    response = client.post(
+        "/ask/stream",
+        data={"question": "What is this?"},
+        headers={"Authorization": f"Bearer {create_session_token('sess1')}"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["X-Answer-Cache"] == "MISS"
+    assert response.text == (
+        'event: answer\ndata: {"index": 0, "answer": "cats"}\n\n'
+        'event: done\ndata: {"cache": "MISS"}\n\n'
+    )
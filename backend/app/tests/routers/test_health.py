@@ -0,0 +1,44 @@
+import pytest
+from app.internal.model_registry import ModelRegistry
+from app.main import app
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+
+@pytest.fixture()
+def registry(mocker):
+    registry = ModelRegistry(eager=True)
+    registry.register("qa", load=lambda: None, warmup=lambda: None)
+    mocker.patch("app.routers.health.get_model_registry", return_value=registry)
+    return registry
+
+
+def test_not_ready_while_models_load(registry):
+    assert client.get("/healthz").status_code == 200
+
+    resp = client.get("/readyz")
+
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "loading"
+    assert resp.json()["models"][0]["state"] == "pending"
+
+
+@pytest.mark.anyio
+async def test_ready_once_models_are_warm(registry):
+    await registry.load_all()
+
+    resp = client.get("/readyz")
+
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "ok"
+    assert resp.json()["models"][0]["load_ms"] is not None
+
+
+@pytest.mark.anyio
+async def test_failed_model_fails_liveness(registry):
+    registry.register("ner", load=lambda: 1 / 0, warmup=lambda: None)
+    await registry.load_all()
+
+    assert client.get("/healthz").status_code == 503
+    assert client.get("/readyz").json()["status"] == "failed"
@@ -0,0 +1,79 @@
+from unittest.mock import AsyncMock, patch
+
+from app.internal.auth import create_session_token
+from app.main import app
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+
+def auth_headers(session_id: str) -> dict:
+    return {"Authorization": f"Bearer {create_session_token(session_id)}"}
+
+
+@patch("app.routers.sessions.resolve_content_id", new_callable=AsyncMock)
+@patch("app.routers.sessions.get_index_status", new_callable=AsyncMock)
+def test_session_status_reports_progress(mock_status, mock_resolve):
+    mock_resolve.return_value = "doc1"
+    mock_status.return_value = {
+        "state": "running",
+        "pages_extracted": "12",
+        "chunks_total": "40",
+        "chunks_embedded": "16",
+        "error": "",
+    }
+
+    resp = client.get("/sessions/sess1/status", headers=auth_headers("sess1"))
+
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "session_id": "sess1",
+        "state": "running",
+        "pages_extracted": 12,
+        "chunks_total": 40,
+        "chunks_embedded": 16,
+        "error": None,
+        "embeddings_dtype": None,
+        "embeddings_bytes": None,
+    }
+    mock_resolve.assert_awaited_once_with("sess1")
+    mock_status.assert_awaited_once_with("doc1")
+
+
+@patch("app.routers.sessions.resolve_content_id", new_callable=AsyncMock)
+@patch("app.routers.sessions.get_index_status", new_callable=AsyncMock)
+def test_session_status_reports_embedding_storage(mock_status, mock_resolve):
+    mock_resolve.return_value = "doc1"
+    mock_status.return_value = {
+        "state": "ready",
+        "pages_extracted": "3",
+        "chunks_total": "2",
+        "chunks_embedded": "2",
+        "embeddings_dtype": "int8",
+        "embeddings_bytes": "824",
+    }
+
+    resp = client.get("/sessions/sess1/status", headers=auth_headers("sess1"))
+
+    assert resp.json()["embeddings_dtype"] == "int8"
+    assert resp.json()["embeddings_bytes"] == 824
+
+
+@patch("app.routers.sessions.get_index_status", new_callable=AsyncMock)
+def test_session_status_rejects_other_sessions(mock_status):
+    resp = client.get("/sessions/other/status", headers=auth_headers("sess1"))
+
+    assert resp.status_code == 403
+    mock_status.assert_not_called()
+
+
+@patch("app.routers.sessions.resolve_content_id", new_callable=AsyncMock)
+@patch("app.routers.sessions.get_index_status", new_callable=AsyncMock)
+def test_session_status_unknown_session(mock_status, mock_resolve):
+    mock_resolve.side_effect = HTTPException(404, detail="Session expired or not found")
+
+    resp = client.get("/sessions/gone/status", headers=auth_headers("gone"))
+
+    assert resp.status_code == 404
+    mock_status.assert_not_called()
@@ -11,10 +11,13 @@ def make_pdf_bytes():
     return b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF"
 
 
+@patch("app.routers.upload.schedule_document_indexing")
 @patch("app.routers.upload.create_document_session")
 @patch("app.routers.upload.create_session_token")
-def test_upload_endpoint_success(mock_token, mock_service):
-    dummy_session = DocumentSession(session_id="sess123", page_texts=["a", "b"])
+def test_upload_endpoint_success(mock_token, mock_service, mock_schedule):
+    dummy_session = DocumentSession(
+        session_id="sess123", page_texts=["a", "b"], content_id="doc123"
+    )
     mock_service.return_value = dummy_session
     mock_token.return_value = "jwt_token"
 
@@ -31,6 +34,7 @@ def test_upload_endpoint_success(mock_token, mock_service):
     }
     mock_service.assert_called_once()
     mock_token.assert_called_once_with("sess123")
+    mock_schedule.assert_called_once_with("doc123")
 
 
 def test_upload_endpoint_bad_file_type():
@@ -0,0 +1,227 @@
+import asyncio
+
+import pytest
+from app.models.ask import Entity, MultiAskResponse, SingleModelAnswer
+from app.pipelines.qa_engine import QATimings
+from app.services import ask
+from fastapi import HTTPException
+
+RESPONSE = MultiAskResponse(
+    results=[
+        SingleModelAnswer(
+            model_name="m", description="d", answer="cats", score=0.9, entities=[]
+        )
+    ]
+)
+
+
+@pytest.fixture()
+def answer_store(mocker, redis_mock):
+    store = {}
+
+    async def fake_get(name):
+        if name.startswith("session:"):
+            return b"doc"
+        return store.get(name)
+
+    async def fake_setex(name, ttl, value):
+        store[name] = value.encode()
+
+    async def fake_mget(names):
+        return [store.get(name) for name in names]
+
+    def fake_pipe_setex(name, ttl, value):
+        store[name] = value.encode()
+
+    redis_mock.get.side_effect = fake_get
+    redis_mock.mget.side_effect = fake_mget
+    redis_mock.setex.side_effect = fake_setex
+    redis_mock.pipeline.return_value.setex.side_effect = fake_pipe_setex
+    mocker.patch.object(ask, "_CACHE_STATS", ask.AnswerCacheStats())
+    return store
+
+
+def test_equivalent_questions_share_a_fingerprint():
+    assert ask.answer_fingerprint("What is the  main topic?") == ask.answer_fingerprint(
+        " what is the main topic? "
+    )
+    assert ask.answer_fingerprint("What is it?") != ask.answer_fingerprint("Who is it?")
+    # Punctuation is a token of its own, so it is part of the key
+    assert ask.answer_fingerprint("What is it?") != ask.answer_fingerprint("What is it")
+
+
+@pytest.mark.parametrize("setting", ["FAISS_HNSW_EF_SEARCH", "FAISS_IVF_NPROBE"])
+def test_search_settings_change_the_model_signature(mocker, setting):
+    before = ask._model_signature()
+    mocker.patch.object(ask.config, setting, getattr(ask.config, setting) + 1)
+    assert ask._model_signature() != before
+
+
+@pytest.mark.anyio
+async def test_repeated_question_is_served_from_cache(mocker, answer_store):
+    compute = mocker.patch.object(ask, "compute_answers", return_value=RESPONSE)
+
+    first, first_status = await ask.answer_question("sess1", "What is it?")
+    second, second_status = await ask.answer_question("sess2", "what is  it?")
+
+    compute.assert_awaited_once_with("sess1", "What is it?", True)
+    assert (first_status, second_status) == ("MISS", "HIT")
+    assert second == first
+    [key] = answer_store
+    assert key.startswith(f"answer:doc:{ask.MODEL_SIGNATURE}:")
+    assert ask._CACHE_STATS.as_dict()["hit_ratio"] == 0.5
+
+
+@pytest.mark.anyio
+async def test_cache_hits_drop_timings(mocker, answer_store):
+    timed = RESPONSE.model_copy(deep=True)
+    timed.results[0].timings = QATimings(forward_ms=12.0)
+    mocker.patch.object(ask, "compute_answers", return_value=timed)
+
+    first, _ = await ask.answer_question("sess1", "What is it?")
+    second, _ = await ask.answer_question("sess1", "What is it?")
+
+    assert first.results[0].timings is not None
+    assert second.results[0].timings is None
+    assert second.results[0].answer == "cats"
+
+
+@pytest.mark.anyio
+async def test_bypass_recomputes_and_refreshes_cache(mocker, answer_store):
+    compute = mocker.patch.object(ask, "compute_answers", return_value=RESPONSE)
+
+    await ask.answer_question("sess1", "What is it?")
+    _, cache_status = await ask.answer_question(
+        "sess1", "What is it?", bypass_cache=True
+    )
+
+    assert cache_status == "BYPASS"
+    assert compute.await_count == 2
+    assert ask._CACHE_STATS.as_dict()["bypassed"] == 1
+
+
+@pytest.mark.anyio
+async def test_answers_without_entities_are_cached_separately(mocker, answer_store):
+    compute = mocker.patch.object(ask, "compute_answers", return_value=RESPONSE)
+
+    await ask.answer_question("sess1", "What is it?")
+    _, cache_status = await ask.answer_question(
+        "sess1", "What is it?", include_entities=False
+    )
+
+    assert cache_status == "MISS"
+    compute.assert_awaited_with("sess1", "What is it?", False)
+    assert len(answer_store) == 2
+
+
+@pytest.mark.anyio
+async def test_batch_computes_only_uncached_distinct_questions(
+    mocker, redis_mock, answer_store
+):
+    mocker.patch.object(ask, "compute_answers", return_value=RESPONSE)
+    await ask.answer_question("sess1", "What is it?")
+
+    compute = mocker.patch.object(
+        ask,
+        "compute_batch_answers",
+        side_effect=lambda _, questions, __: [RESPONSE] * len(questions),
+    )
+    result, statuses = await ask.answer_questions(
+        "sess1", ["what is it?", "Who is it?", "who is it?"]
+    )
+
+    compute.assert_awaited_once_with("doc", ["Who is it?"], True)
+    assert statuses == ["HIT", "MISS", "MISS"]
+    assert result.results == [RESPONSE] * 3
+    assert len(answer_store) == 2
+    redis_mock.mget.assert_awaited_once()
+    redis_mock.pipeline.return_value.execute.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_batch_rejects_too_many_questions(mocker, answer_store):
+    mocker.patch.object(ask.config, "ASK_BATCH_MAX_QUESTIONS", 2)
+
+    with pytest.raises(HTTPException) as exc:
+        await ask.answer_questions("sess1", ["a", "b", "c"])
+
+    assert exc.value.status_code == 422
+
+
+@pytest.fixture()
+def stream_mocks(mocker):
+    async def slow_qa(session_id, question):
+        await asyncio.sleep(0.05)
+        return "full", 0.5, QATimings()
+
+    async def fast_rag(session_id, question):
+        return "rag", 0.7
+
+    mocker.patch.object(ask.qa, "run_qa_pipeline", side_effect=slow_qa)
+    mocker.patch.object(ask.rag, "run_rag_pipeline", side_effect=fast_rag)
+    return mocker.patch.object(
+        ask.ner,
+        "extract_entities",
+        side_effect=lambda texts: [
+            [Entity(entity=t, type="MISC", score=1.0)] for t in texts
+        ],
+    )
+
+
+async def collect(events):
+    return [(event, data) async for event, data in events]
+
+
+@pytest.mark.anyio
+async def test_stream_emits_each_answer_as_it_finishes(stream_mocks, answer_store):
+    events, cache_status = await ask.stream_answers("sess1", "What is it?")
+    received = await collect(events)
+
+    assert cache_status == "MISS"
+    kinds = [(event, data.get("index")) for event, data in received]
+    assert kinds[0] == ("answer", 1)
+    assert kinds.index(("answer", 0)) < kinds.index(("entities", 0))
+    assert sorted(kinds[:-1]) == [
+        ("answer", 0),
+        ("answer", 1),
+        ("entities", 0),
+        ("entities", 1),
+    ]
+    assert received[-1] == ("done", {"cache": "MISS"})
+    assert "entities" not in received[0][1]
+
+    cached = MultiAskResponse.model_validate_json(next(iter(answer_store.values())))
+    assert [a.answer for a in cached.results] == ["full", "rag"]
+    assert cached.results[1].entities[0].entity == "rag"
+
+
+@pytest.mark.anyio
+async def test_stream_replays_cached_answers(stream_mocks, answer_store):
+    await collect((await ask.stream_answers("sess1", "What is it?"))[0])
+
+    events, cache_status = await ask.stream_answers("sess2", "what is it?")
+    received = await collect(events)
+
+    assert cache_status == "HIT"
+    assert [event for event, _ in received] == ["answer", "answer", "done"]
+    assert received[0][1]["entities"][0]["entity"] == "full"
+
+
+@pytest.mark.anyio
+async def test_stream_reports_branch_errors_as_events(
+    stream_mocks, answer_store, mocker
+):
+    mocker.patch.object(
+        ask.rag,
+        "run_rag_pipeline",
+        side_effect=HTTPException(404, detail="No relevant chunks"),
+    )
+
+    events, _ = await ask.stream_answers("sess1", "What is it?")
+    received = await collect(events)
+
+    assert received[-1] == (
+        "error",
+        {"status_code": 404, "detail": "No relevant chunks"},
+    )
+    assert not answer_store
@@ -0,0 +1,77 @@
+import pickle
+
+import numpy as np
+import pytest
+from app.services import session
+from app.services.embedding_format import (
+    decode_embeddings,
+    encode_embeddings,
+    is_encoded_embeddings,
+)
+from fastapi import HTTPException
+
+
+def make_embeddings() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((5, 384), dtype=np.float32)
+
+
+def test_float32_round_trip_is_zero_copy():
+    embeddings = make_embeddings()
+
+    data = encode_embeddings(embeddings, "all-MiniLM-L6-v2")
+    decoded, header = decode_embeddings(data)
+
+    assert is_encoded_embeddings(data)
+    np.testing.assert_array_equal(decoded, embeddings)
+    assert not decoded.flags.owndata
+    assert not decoded.flags.writeable
+    assert header.model_name == "all-MiniLM-L6-v2"
+    assert header.dtype == "float32"
+    assert header.shape == (5, 384)
+
+
+def test_float16_round_trip_halves_payload():
+    embeddings = make_embeddings()
+
+    data32 = encode_embeddings(embeddings, "m")
+    data16 = encode_embeddings(embeddings, "m", dtype="float16")
+    decoded, header = decode_embeddings(data16)
+
+    assert header.dtype == "float16"
+    assert len(data16) < len(data32) / 2 + 64
+    np.testing.assert_allclose(decoded, embeddings, atol=1e-2)
+
+
+def test_int8_round_trip_quarters_payload():
+    embeddings = make_embeddings()
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings[2] = 0.0
+
+    data32 = encode_embeddings(embeddings, "m")
+    data8 = encode_embeddings(embeddings, "m", dtype="int8")
+    decoded, header = decode_embeddings(data8)
+
+    assert header.dtype == "int8"
+    assert decoded.dtype == np.float32
+    assert len(data8) < len(data32) / 4 + 64
+    np.testing.assert_allclose(decoded, embeddings, atol=1e-3)
+    assert not decoded[2].any()
+
+
+def test_decode_rejects_unknown_data():
+    with pytest.raises(ValueError):
+        decode_embeddings(pickle.dumps(make_embeddings()))
+
+    with pytest.raises(ValueError):
+        encode_embeddings(make_embeddings(), "m", dtype="int4")
+
+
+@pytest.mark.anyio
+async def test_load_cached_embeddings_rejects_unencoded_data(redis_mock):
+    redis_mock.get.return_value = pickle.dumps(make_embeddings())
+
+    with pytest.raises(HTTPException) as exc:
+        await session.load_cached_embeddings("doc")
+
+    assert exc.value.status_code == 500
@@ -0,0 +1,55 @@
+import fitz
+import pytest
+from app.internal.config import config
+from app.services import extraction
+
+
+@pytest.fixture()
+def pdf_path(tmp_path):
+    doc = fitz.open()
+    for i in range(7):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page number {i}")
+    path = tmp_path / "doc.pdf"
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture()
+def extraction_workers(mocker):
+    def set_workers(workers: int):
+        extraction.shutdown_extraction_pool()
+        mocker.patch.object(config, "PDF_EXTRACT_WORKERS", workers)
+
+    yield set_workers
+    extraction.shutdown_extraction_pool()
+
+
+async def collect(path: str, batch_size: int):
+    return [batch async for batch in extraction.iter_page_batches(path, batch_size)]
+
+
+@pytest.mark.anyio
+async def test_sequential_extraction_yields_batches_in_order(
+    pdf_path, extraction_workers
+):
+    extraction_workers(1)
+
+    batches = await collect(pdf_path, 3)
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    pages = [page for batch in batches for page in batch]
+    assert [f"Page number {i}" in page for i, page in enumerate(pages)] == [True] * 7
+
+
+@pytest.mark.anyio
+async def test_parallel_extraction_matches_sequential(pdf_path, extraction_workers):
+    extraction_workers(1)
+    sequential = await collect(pdf_path, 2)
+
+    extraction_workers(2)
+    parallel = await collect(pdf_path, 2)
+
+    assert extraction.get_extraction_pool() is not None
+    assert parallel == sequential
@@ -0,0 +1,121 @@
+import pickle
+
+import numpy as np
+import pytest
+from app.services import session
+from app.services.embedding_format import decode_embeddings
+from fastapi import HTTPException
+from redis.exceptions import ResponseError
+
+
+@pytest.mark.anyio
+async def test_load_cached_chunks_uses_single_hmget(redis_mock):
+    redis_mock.hmget.return_value = [b"first", None, b"third"]
+
+    chunks = await session.load_cached_chunks("sess", [0, 7, 2])
+
+    assert chunks == ["first", "third"]
+    redis_mock.hmget.assert_awaited_once_with("chunks:sess", ["0", "7", "2"])
+    redis_mock.hget.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_load_cached_chunks_without_ids_skips_redis(redis_mock):
+    assert await session.load_cached_chunks("sess", []) == []
+    redis_mock.hmget.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_cache_chunks_and_embeddings_writes_in_one_transaction(redis_mock):
+    pipe = redis_mock.pipeline.return_value
+    embeddings = np.ones((2, 4), dtype=np.float32)
+
+    await session.cache_chunks_and_embeddings("sess", ["a", "b"], embeddings, "model")
+
+    redis_mock.pipeline.assert_called_once_with(transaction=True)
+    pipe.delete.assert_called_once_with("chunks:sess", "chunkmeta:sess", "index:sess")
+    pipe.hset.assert_any_call("chunks:sess", mapping={"0": "a", "1": "b"})
+    pipe.expire.assert_any_call("chunks:sess", session.SESSION_TTL)
+
+    key, ttl, data = pipe.setex.call_args.args
+    assert (key, ttl) == ("embeds:sess", session.SESSION_TTL)
+    decoded, header = decode_embeddings(data)
+    np.testing.assert_allclose(decoded, embeddings, atol=1e-2)
+    pipe.hset.assert_called_with(
+        "status:sess",
+        mapping={"embeddings_dtype": header.dtype, "embeddings_bytes": str(len(data))},
+    )
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_chunk_metadata_is_written_with_the_chunks(redis_mock):
+    pipe = redis_mock.pipeline.return_value
+    meta = {"page_start": 0, "page_end": 1, "char_start": 5, "char_end": 9}
+
+    await session.cache_chunks_and_embeddings(
+        "sess", ["a"], np.ones((1, 4), np.float32), "model", metadata=[meta]
+    )
+
+    meta_call = pipe.hset.call_args_list[1]
+    assert meta_call.args[0] == "chunkmeta:sess"
+    redis_mock.hmget.return_value = [meta_call.kwargs["mapping"]["0"].encode(), None]
+    assert await session.load_chunk_metadata("sess", [0, 3]) == {0: meta}
+
+
+@pytest.mark.anyio
+async def test_has_cached_embeddings_requires_chunks_and_embeddings(redis_mock):
+    redis_mock.exists.return_value = 1
+
+    assert await session.has_cached_embeddings("sess") is False
+    redis_mock.exists.assert_awaited_once_with("chunks:sess", "embeds:sess")
+
+    redis_mock.exists.return_value = 2
+    assert await session.has_cached_embeddings("sess") is True
+
+
+@pytest.mark.anyio
+async def test_create_session_refreshes_shared_document_ttl(redis_mock):
+    session_id = await session.create_session("doc")
+
+    pipe = redis_mock.pipeline.return_value
+    pipe.setex.assert_called_once_with(
+        f"session:{session_id}", session.SESSION_TTL, "doc"
+    )
+    expired = {c.args for c in pipe.expire.call_args_list}
+    assert ("pages:doc", session.SESSION_TTL) in expired
+    assert ("embeds:doc", session.SESSION_TTL) in expired
+    assert ("index:doc", session.SESSION_TTL) in expired
+
+
+@pytest.mark.anyio
+async def test_get_session_text_follows_content_pointer(redis_mock):
+    redis_mock.get.return_value = b"doc"
+    redis_mock.lrange.return_value = [b"page1", b"page2"]
+
+    doc = await session.get_session_text("sess")
+
+    redis_mock.get.assert_awaited_once_with("session:sess")
+    redis_mock.lrange.assert_awaited_once_with("pages:doc", 0, -1)
+    assert doc.page_texts == ["page1", "page2"]
+    assert doc.content_id == "doc"
+
+
+@pytest.mark.parametrize(
+    "stored",
+    [
+        pickle.dumps(["page1", "page2"]),
+        ResponseError("WRONGTYPE Operation against a key holding the wrong kind"),
+    ],
+)
+@pytest.mark.anyio
+async def test_legacy_sessions_are_not_found(redis_mock, stored):
+    if isinstance(stored, Exception):
+        redis_mock.get.side_effect = stored
+    else:
+        redis_mock.get.return_value = stored
+
+    with pytest.raises(HTTPException) as exc:
+        await session.resolve_content_id("sess")
+
+    assert exc.value.status_code == 404
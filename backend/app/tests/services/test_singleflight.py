@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from app.services.singleflight import SingleFlight
+
+
+def make_done(results):
+    calls = iter(results)
+
+    async def done():
+        return next(calls)
+
+    return done
+
+
+@pytest.mark.anyio
+async def test_leader_runs_once_for_concurrent_callers(redis_mock):
+    runs = []
+
+    async def fn():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+
+    flight = SingleFlight("test", lease=10, poll_interval=0.01)
+    done = make_done([False])
+
+    await asyncio.gather(flight.do("sess", fn, done), flight.do("sess", fn, done))
+
+    assert runs == [1]
+    lock = redis_mock.lock.return_value
+    redis_mock.lock.assert_called_once_with(
+        "lock:test:sess", timeout=10, blocking=False, thread_local=False
+    )
+    lock.acquire.assert_awaited_once_with(blocking=False)
+    lock.release.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_follower_waits_for_other_worker_result(redis_mock):
+    lock = redis_mock.lock.return_value
+    lock.acquire.return_value = False
+    runs = []
+
+    async def fn():
+        runs.append(1)
+
+    flight = SingleFlight("test", lease=10, poll_interval=0.001)
+
+    await flight.do("sess", fn, make_done([False, False, True]))
+
+    assert runs == []
+    assert lock.acquire.await_count == 2
+    lock.release.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_lease_is_renewed_while_running(redis_mock):
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    flight = SingleFlight("test", lease=0.03, poll_interval=0.01)
+
+    await flight.do("sess", slow, make_done([False]))
+
+    assert redis_mock.lock.return_value.reacquire.await_count >= 1
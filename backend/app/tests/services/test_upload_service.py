@@ -1,8 +1,12 @@
-import pickle
+import asyncio
+import hashlib
+import os
 from uuid import UUID
 
 import pytest
+from app.internal.config import config
 from app.models.domain import DocumentSession
+from app.services import upload
 from app.services.upload import create_document_session
 from fastapi import HTTPException
 
@@ -12,9 +16,14 @@ class DummyUploadFile:
         self.filename = filename
         self.content_type = content_type
         self._data = data
+        self._offset = 0
 
-    async def read(self) -> bytes:
-        return self._data
+    async def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = len(self._data) - self._offset
+        chunk = self._data[self._offset : self._offset + size]
+        self._offset += len(chunk)
+        return chunk
 
 
 class DummyPage:
@@ -28,12 +37,57 @@ class DummyPage:
 class DummyDoc:
     def __init__(self, pages):
         self._pages = pages
+        self.closed = False
+
+    @property
+    def page_count(self):
+        return len(self._pages)
+
+    def __getitem__(self, i):
+        return self._pages[i]
 
     def __iter__(self):
         return iter(self._pages)
 
     def close(self):
-        pass
+        self.closed = True
+
+
+@pytest.fixture()
+def session_store(redis_mock):
+    store = {}
+    pipe = redis_mock.pipeline.return_value
+
+    def fake_rpush(name, *values):
+        store.setdefault(name, []).extend(v.encode() for v in values)
+
+    def fake_rename(src, dst):
+        store[dst] = store.pop(src)
+
+    def fake_setex(name, ttl, value):
+        store[name] = value.encode()
+
+    def fake_delete(*names):
+        for name in names:
+            store.pop(name, None)
+
+    async def fake_get(name):
+        return store.get(name)
+
+    async def fake_lrange(name, start, end):
+        return store.get(name, [])
+
+    async def fake_exists(*names):
+        return sum(name in store for name in names)
+
+    pipe.rpush.side_effect = fake_rpush
+    pipe.rename.side_effect = fake_rename
+    pipe.setex.side_effect = fake_setex
+    pipe.delete.side_effect = fake_delete
+    redis_mock.get.side_effect = fake_get
+    redis_mock.lrange.side_effect = fake_lrange
+    redis_mock.exists.side_effect = fake_exists
+    return store
 
 
 @pytest.mark.anyio
@@ -46,37 +100,159 @@ async def test_invalid_content_type(mocker):
 
 
 @pytest.mark.anyio
-async def test_create_session_success(mocker):
+async def test_create_session_success(mocker, redis_mock, session_store):
     dummy_bytes = b"%PDF-1.4 dummy content"
     fake_file = DummyUploadFile("foo.pdf", "application/pdf", dummy_bytes)
 
-    pages = [DummyPage("page1"), DummyPage("page2")]
+    pages = [DummyPage("page1"), DummyPage("page2"), DummyPage("page3")]
     dummy_doc = DummyDoc(pages)
-    mocker.patch("app.services.upload.fitz.open", return_value=dummy_doc)
+    spooled = {}
 
-    calls = []
-    stored_sessions = {}
+    def fake_open(path):
+        with open(path, "rb") as f:
+            spooled["path"], spooled["data"] = path, f.read()
+        return dummy_doc
 
-    def fake_setex(name, time, value):
-        calls.append((name, time, value))
-        stored_sessions[name] = value
-
-    def fake_get(name):
-        return stored_sessions.get(name)
-
-    mocker.patch("app.services.session.redis_client.setex", side_effect=fake_setex)
-    mocker.patch("app.services.session.redis_client.get", side_effect=fake_get)
+    mocker.patch("app.services.extraction.fitz.open", side_effect=fake_open)
+    mocker.patch.object(config, "PDF_PAGE_BATCH_SIZE", 2)
 
     session = await create_document_session(fake_file)
 
     assert isinstance(session, DocumentSession)
     UUID(session.session_id, version=4)
-    assert session.page_texts == ["page1", "page2"]
+    assert session.page_texts == ["page1", "page2", "page3"]
+    assert session.content_id == hashlib.sha256(dummy_bytes).hexdigest()
+
+    assert spooled["data"] == dummy_bytes
+    assert not os.path.exists(spooled["path"])
+    assert dummy_doc.closed
+
+    pipe = redis_mock.pipeline.return_value
+    staging = f"pages:{session.content_id}:staging"
+    assert [c.args for c in pipe.rpush.call_args_list] == [
+        (staging, "page1", "page2"),
+        (staging, "page3"),
+    ]
+    pipe.rename.assert_called_once_with(staging, f"pages:{session.content_id}")
+    assert session_store[f"session:{session.session_id}"] == session.content_id.encode()
+    ttl = pipe.expire.call_args.args[1]
+    assert isinstance(ttl, int) and ttl > 0
+
+
+@pytest.mark.anyio
+async def test_repeat_upload_reuses_extracted_text(mocker, redis_mock, session_store):
+    dummy_bytes = b"%PDF-1.4 same document"
+    dummy_doc = DummyDoc([DummyPage("page1"), DummyPage("page2")])
+    fitz_open = mocker.patch(
+        "app.services.extraction.fitz.open", return_value=dummy_doc
+    )
+
+    first = await create_document_session(
+        DummyUploadFile("a.pdf", "application/pdf", dummy_bytes)
+    )
+    second = await create_document_session(
+        DummyUploadFile("b.pdf", "application/pdf", dummy_bytes)
+    )
+
+    fitz_open.assert_called_once()
+    assert first.session_id != second.session_id
+    assert first.content_id == second.content_id
+    assert second.page_texts == ["page1", "page2"]
+
+
+@pytest.mark.anyio
+async def test_concurrent_uploads_extract_once(mocker, redis_mock, session_store):
+    dummy_bytes = b"%PDF-1.4 same document"
+    dummy_doc = DummyDoc([DummyPage("page1")])
+    fitz_open = mocker.patch(
+        "app.services.extraction.fitz.open", return_value=dummy_doc
+    )
 
-    assert len(calls) == 1
-    name, time_arg, pickled = calls[0]
-    assert name == f"session:{session.session_id}"
-    assert isinstance(time_arg, int) and time_arg > 0
+    sessions = await asyncio.gather(
+        *(
+            create_document_session(
+                DummyUploadFile(f"{i}.pdf", "application/pdf", dummy_bytes)
+            )
+            for i in range(3)
+        )
+    )
+
+    fitz_open.assert_called_once()
+    assert len({s.session_id for s in sessions}) == 3
+    assert all(s.page_texts == ["page1"] for s in sessions)
+
+
+@pytest.mark.anyio
+async def test_cancelled_uploader_does_not_remove_the_shared_file(
+    mocker, redis_mock, session_store
+):
+    dummy_bytes = b"%PDF-1.4 same document"
+    content_id = hashlib.sha256(dummy_bytes).hexdigest()
+    opened = []
+
+    def fake_open(path):
+        opened.append((path, os.path.exists(path)))
+        return DummyDoc([DummyPage("page1")])
+
+    mocker.patch("app.services.extraction.fitz.open", side_effect=fake_open)
+    resume = asyncio.Event()
+    reset = upload.reset_staged_pages
+
+    async def held_reset(cid):
+        await resume.wait()
+        await reset(cid)
+
+    mocker.patch.object(upload, "reset_staged_pages", side_effect=held_reset)
+
+    first = asyncio.ensure_future(
+        create_document_session(
+            DummyUploadFile("a.pdf", "application/pdf", dummy_bytes)
+        )
+    )
+    while not upload._EXTRACTION.in_flight(content_id):
+        await asyncio.sleep(0)
+    second = asyncio.ensure_future(
+        create_document_session(
+            DummyUploadFile("b.pdf", "application/pdf", dummy_bytes)
+        )
+    )
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    resume.set()
+
+    session = await second
+
+    assert session.page_texts == ["page1"]
+    assert [exists for _, exists in opened] == [True]
+    assert not os.path.exists(opened[0][0])
+
+
+@pytest.mark.anyio
+async def test_upload_over_byte_limit_is_rejected(mocker, redis_mock):
+    mocker.patch.object(config, "MAX_UPLOAD_BYTES", 10)
+    fake_file = DummyUploadFile("big.pdf", "application/pdf", b"x" * 11)
+    fitz_open = mocker.patch("app.services.extraction.fitz.open")
+
+    with pytest.raises(HTTPException) as exc:
+        await create_document_session(fake_file)
+
+    assert exc.value.status_code == 413
+    fitz_open.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_upload_over_page_limit_is_rejected(mocker, redis_mock, session_store):
+    mocker.patch.object(config, "MAX_PDF_PAGES", 1)
+    fake_file = DummyUploadFile("long.pdf", "application/pdf", b"%PDF-1.4")
+    dummy_doc = DummyDoc([DummyPage("a"), DummyPage("b")])
+    mocker.patch("app.services.extraction.fitz.open", return_value=dummy_doc)
+
+    with pytest.raises(HTTPException) as exc:
+        await create_document_session(fake_file)
 
-    stored = pickle.loads(pickled)
-    assert stored == ["page1", "page2"]
+    assert exc.value.status_code == 413
+    assert dummy_doc.closed
+    redis_mock.pipeline.return_value.rpush.assert_not_called()
+    assert session_store == {}
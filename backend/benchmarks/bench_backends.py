@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import re
+import string
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("ENV_STATE", "dev")
+
+from app.internal.config import config  # noqa: E402
+from app.pipelines import ner, qa_engine, rag  # noqa: E402
+
+DATA = Path(__file__).resolve().parent / "data" / "questions.json"
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def use_backend(backend: str) -> None:
+    config.QA_BACKEND = backend
+    config.NER_BACKEND = backend
+    config.EMBED_BACKEND = backend
+    qa_engine.get_qa_model.cache_clear()
+    ner.get_ner_pipeline.cache_clear()
+    rag.get_embedder.cache_clear()
+
+
+def normalize_answer(text: str) -> str:
+    text = "".join(ch for ch in text.lower() if ch not in string.punctuation)
+    text = re.sub(r"\b(a|an|the)\b", " ", text)
+    return " ".join(text.split())
+
+
+def token_f1(prediction: str, gold: str) -> float:
+    pred, ref = normalize_answer(prediction).split(), normalize_answer(gold).split()
+    common = sum((Counter(pred) & Counter(ref)).values())
+    if not common:
+        return 0.0
+    precision, recall = common / len(pred), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def timed_load(load) -> float:
+    started = time.perf_counter()
+    load()
+    return time.perf_counter() - started
+
+
+def bench_qa(items: list[dict], repeat: int) -> dict:
+    load_s = timed_load(qa_engine.get_qa_model)
+
+    latencies, exact, f1, answers = [], 0, 0.0, []
+    for item in items:
+        windows = qa_engine.tokenize_document(item["context"])
+        qa_engine.answer_full_context(item["question"], windows)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            answer, _, _ = qa_engine.answer_full_context(item["question"], windows)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        answers.append(answer)
+        golds = [normalize_answer(gold) for gold in item["answers"]]
+        exact += normalize_answer(answer) in golds
+        f1 += max(token_f1(answer, gold) for gold in item["answers"])
+
+    p50, p95 = percentiles(latencies)
+    return {
+        "load_s": load_s,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "exact": exact / len(items),
+        "f1": f1 / len(items),
+        "answers": answers,
+    }
+
+
+def bench_ner(items: list[dict], repeat: int) -> dict:
+    load_s = timed_load(ner.get_ner_pipeline)
+    pipeline = ner.get_ner_pipeline()
+
+    latencies, true_pos, predicted, expected = [], 0, 0, 0
+    for item in items:
+        # The pipeline is called directly so the entity memo does not hide latency
+        pipeline([item["text"]], batch_size=1)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            raw = pipeline([item["text"]], batch_size=1)[0]
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        found = {(e.entity.lower(), e.type) for e in ner.to_entities(raw)}
+        gold = {(text.lower(), kind) for text, kind in item["entities"]}
+        true_pos += len(found & gold)
+        predicted += len(found)
+        expected += len(gold)
+
+    precision = true_pos / predicted if predicted else 0.0
+    recall = true_pos / expected if expected else 0.0
+    p50, p95 = percentiles(latencies)
+    return {
+        "load_s": load_s,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "f1": 2 * precision * recall / (precision + recall) if true_pos else 0.0,
+    }
+
+
+def bench_embedder(items: list[dict], repeat: int) -> dict:
+    load_s = timed_load(rag.get_embedder)
+
+    contexts = sorted({item["context"] for item in items})
+    questions = [item["question"] for item in items]
+    targets = [contexts.index(item["context"]) for item in items]
+
+    latencies = []
+    rag.embed_question(questions[0])
+    for question in questions:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rag.embed_question(question)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    context_emb = rag.embed_chunks(contexts)
+    question_emb = rag.embed_chunks(questions)
+    context_emb /= np.linalg.norm(context_emb, axis=1, keepdims=True)
+    question_emb /= np.linalg.norm(question_emb, axis=1, keepdims=True)
+    top1 = (question_emb @ context_emb.T).argmax(axis=1)
+
+    p50, p95 = percentiles(latencies)
+    return {
+        "load_s": load_s,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "top1": float(np.mean(top1 == np.array(targets))),
+        "embeddings": np.vstack([context_emb, question_emb]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Accuracy and latency of the torch and ONNX Runtime backends "
+        "per model over a fixed question set"
+    )
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument(
+        "--models", nargs="+", choices=("qa", "ner", "embedder"), default=None
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    models = args.models or ["qa", "ner", "embedder"]
+
+    data = json.loads(DATA.read_text())
+    results = {}
+    for backend in args.backends:
+        use_backend(backend)
+        results[backend] = {}
+        if "qa" in models:
+            results[backend]["qa"] = bench_qa(data["qa"], args.repeat)
+        if "ner" in models:
+            results[backend]["ner"] = bench_ner(data["ner"], args.repeat)
+        if "embedder" in models:
+            results[backend]["embedder"] = bench_embedder(data["qa"], args.repeat)
+
+    reference = results[args.backends[0]]
+    header = f"{'backend':<12}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+
+    if "qa" in models:
+        print(f"\nQA ({qa_engine.MODEL_NAME}, {len(data['qa'])} questions)")
+        print(f"{header}{'EM':>7}{'F1':>7}{'agree':>8}")
+        for backend, r in ((b, results[b]["qa"]) for b in args.backends):
+            agree = np.mean(
+                [a == b for a, b in zip(r["answers"], reference["qa"]["answers"])]
+            )
+            print(
+                f"{backend:<12}{r['load_s']:>8.1f}{r['p50_ms']:>9.1f}"
+                f"{r['p95_ms']:>9.1f}{r['exact']:>7.2f}{r['f1']:>7.2f}{agree:>8.2f}"
+            )
+
+    if "ner" in models:
+        print(f"\nNER ({ner.MODEL_NAME}, {len(data['ner'])} sentences)")
+        print(f"{header}{'F1':>7}")
+        for backend, r in ((b, results[b]["ner"]) for b in args.backends):
+            print(
+                f"{backend:<12}{r['load_s']:>8.1f}{r['p50_ms']:>9.1f}"
+                f"{r['p95_ms']:>9.1f}{r['f1']:>7.2f}"
+            )
+
+    if "embedder" in models:
+        print(f"\nEmbedder ({rag.MODEL_NAME}, {len(data['qa'])} questions)")
+        print(f"{header}{'top1':>7}{'cosine':>8}")
+        for backend, r in ((b, results[b]["embedder"]) for b in args.backends):
+            # Mean cosine similarity to the first backend's embeddings
+            cosine = np.mean(
+                np.sum(r["embeddings"] * reference["embedder"]["embeddings"], axis=1)
+            )
+            print(
+                f"{backend:<12}{r['load_s']:>8.1f}{r['p50_ms']:>9.1f}"
+                f"{r['p95_ms']:>9.1f}{r['top1']:>7.2f}{cosine:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
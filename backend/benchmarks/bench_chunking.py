@@ -0,0 +1,125 @@
+import argparse
+import os
+import random
+import re
+import time
+from pathlib import Path
+
+import fitz
+import numpy as np
+
+os.environ.setdefault("ENV_STATE", "dev")
+
+from app.pipelines import rag  # noqa: E402
+from app.pipelines.chunking import (  # noqa: E402
+    chunk_document,
+    document_text,
+    split_paragraphs,
+)
+
+EXAMPLE_DOCS = Path(__file__).resolve().parents[2] / "example_docs"
+
+SENTENCE = re.compile(r"[A-Z][^.!?]{40,200}[.!?]")
+
+
+def load_pages(path: Path) -> list[str]:
+    with fitz.open(path) as doc:
+        return [page.get_text() for page in doc]
+
+
+def paragraph_chunks(pages: list[str]) -> list[tuple[str, int, int]]:
+    # The previous chunker: every blank-line separated paragraph is a chunk
+    text = document_text(pages)
+    return [(text[start:end], start, end) for _, start, end in split_paragraphs(pages)]
+
+
+def token_chunks(
+    pages: list[str], max_tokens: int, overlap: int
+) -> list[tuple[str, int, int]]:
+    chunks = chunk_document(pages, rag.get_chunk_tokenizer(), max_tokens, overlap)
+    return [(c.text, c.char_start, c.char_end) for c in chunks]
+
+
+def sample_sentences(text: str, count: int, seed: int) -> list[tuple[str, int, int]]:
+    found = [(m.group(), m.start(), m.end()) for m in SENTENCE.finditer(text)]
+    return random.Random(seed).sample(found, min(count, len(found)))
+
+
+def evaluate(chunks, queries, query_emb: np.ndarray, k: int) -> dict:
+    tokenizer = rag.get_chunk_tokenizer()
+    limit = rag.get_embedder().max_seq_length - 2
+
+    started = time.perf_counter()
+    embeddings = rag.embed_chunks([text for text, _, _ in chunks])
+    embed_s = time.perf_counter() - started
+
+    lengths = [
+        len(ids)
+        for ids in tokenizer(
+            [text for text, _, _ in chunks], add_special_tokens=False, verbose=False
+        )["input_ids"]
+    ]
+
+    # A query hits when a retrieved chunk contains the whole source sentence
+    hits = 0
+    if queries:
+        _, ids = rag.build_faiss_index(embeddings).search(query_emb, k)
+        hits = sum(
+            any(chunks[i][1] <= start and end <= chunks[i][2] for i in row if i >= 0)
+            for row, (_, start, end) in zip(ids, queries)
+        )
+    return {
+        "chunks": len(chunks),
+        "mean_tokens": float(np.mean(lengths)),
+        "truncated": sum(n > limit for n in lengths),
+        "embed_s": embed_s,
+        "hit_rate": hits / len(queries) if queries else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chunk count, embedding time and retrieval hit rate of the "
+        "paragraph and token-budget chunkers over example_docs/"
+    )
+    parser.add_argument("--budgets", type=int, nargs="+", default=[128, 254])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 32])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rag.get_embedder()
+    strategies = {"paragraphs": paragraph_chunks}
+    for budget in args.budgets:
+        for overlap in args.overlaps:
+            strategies[f"tokens {budget}/{overlap}"] = (
+                lambda pages, b=budget, o=overlap: token_chunks(pages, b, o)
+            )
+
+    print(f"Hit rate: sampled sentence inside one of the top {args.k} chunks")
+    for path in sorted(EXAMPLE_DOCS.glob("*.pdf")):
+        pages = load_pages(path)
+        queries = sample_sentences(document_text(pages), args.queries, args.seed)
+        query_emb = rag.embed_questions([q for q, _, _ in queries]) if queries else None
+
+        print(f"\n{path.name}: {len(pages)} pages, {len(queries)} queries")
+        print(
+            f"{'chunker':<18}{'chunks':>8}{'tokens':>8}{'trunc':>7}"
+            f"{'chunk s':>9}{'embed s':>9}{'hit rate':>10}"
+        )
+        for name, chunker in strategies.items():
+            started = time.perf_counter()
+            chunks = chunker(pages)
+            chunk_s = time.perf_counter() - started
+
+            r = evaluate(chunks, queries, query_emb, args.k)
+            print(
+                f"{name:<18}{r['chunks']:>8}{r['mean_tokens']:>8.1f}"
+                f"{r['truncated']:>7}{chunk_s:>9.3f}{r['embed_s']:>9.2f}"
+                f"{r['hit_rate']:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("ENV_STATE", "dev")
+
+from app.internal.config import config  # noqa: E402
+from app.internal.cpu import (  # noqa: E402
+    apply_cpu_settings,
+    available_cores,
+    get_cpu_settings,
+)
+
+DATA = Path(__file__).resolve().parent / "data" / "questions.json"
+
+
+def make_workload(name: str):
+    items = json.loads(DATA.read_text())["qa"]
+
+    if name == "qa":
+        from app.pipelines import qa_engine
+
+        qa_engine.get_qa_model()
+        documents = [
+            (item["question"], qa_engine.tokenize_document(item["context"]))
+            for item in items
+        ]
+        return lambda i: qa_engine.answer_full_context(*documents[i % len(documents)])
+
+    from app.pipelines import rag
+
+    rag.get_embedder()
+    questions = [item["question"] for item in items]
+    return lambda i: rag.embed_question(questions[i % len(questions)])
+
+
+def run_child(workload: str, workers: int, threads: int, seconds: float) -> None:
+    # Same sizing the app does at startup, with the values under test
+    config.INFERENCE_WORKERS = workers
+    config.INTRA_OP_THREADS = threads or None
+    get_cpu_settings.cache_clear()
+    settings = apply_cpu_settings()
+
+    call = make_workload(workload)
+    call(0)
+
+    latencies: list[float] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            call(i)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+            i += workers
+
+    pool = [threading.Thread(target=worker, args=(w,)) for w in range(workers)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    print(
+        json.dumps(
+            {"intra_op_threads": settings.intra_op_threads, "latencies": latencies}
+        )
+    )
+
+
+def run_combination(
+    workload: str, processes: int, workers: int, threads: int, seconds: float
+) -> dict:
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.bench_cpu_threads",
+        "--child",
+        "--workload",
+        workload,
+        "--workers",
+        str(workers),
+        "--threads",
+        str(threads),
+        "--seconds",
+        str(seconds),
+    ]
+    # Children size their threads for this many processes sharing the cores
+    env = {**os.environ, "DEV_PROCESS_WORKERS": str(processes)}
+    children = [
+        subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env)
+        for _ in range(processes)
+    ]
+
+    latencies, intra = [], 0
+    for child in children:
+        stdout, _ = child.communicate()
+        if child.returncode != 0:
+            raise RuntimeError(f"Benchmark child exited with {child.returncode}")
+        result = json.loads(stdout.strip().splitlines()[-1])
+        latencies.extend(result["latencies"])
+        intra = result["intra_op_threads"]
+
+    return {
+        "intra": intra,
+        "throughput": len(latencies) / seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput and tail latency of CPU inference for combinations "
+        "of processes, inference workers and intra-op threads"
+    )
+    parser.add_argument("--workload", choices=("qa", "embed"), default="qa")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="intra-op threads per process, 0 splits the cores evenly",
+    )
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.workload, args.workers[0], args.threads[0], args.seconds)
+        return
+
+    cores = available_cores()
+    print(f"{args.workload} workload, {cores} cores, {args.seconds:.0f}s per run")
+    print(
+        f"{'procs':>6}{'workers':>8}{'intra':>7}{'threads':>9}"
+        f"{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+    )
+    for processes, workers, threads in itertools.product(
+        args.processes, args.workers, args.threads
+    ):
+        r = run_combination(args.workload, processes, workers, threads, args.seconds)
+        total = processes * workers * r["intra"]
+        # More busy threads than cores means the runs compete for CPU
+        flag = " oversubscribed" if total > cores else ""
+        print(
+            f"{processes:>6}{workers:>8}{r['intra']:>7}{total:>9}"
+            f"{r['throughput']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{flag}"
+        )
+
+
+if __name__ == "__main__":
+    main()
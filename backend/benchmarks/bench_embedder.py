@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("ENV_STATE", "dev")
+
+from app.internal.config import config  # noqa: E402
+from app.internal.executor import get_inference_executor  # noqa: E402
+from app.pipelines import rag  # noqa: E402
+
+DATA = Path(__file__).resolve().parent / "data" / "questions.json"
+
+
+def make_chunks(contexts: list[str], n: int, seed: int) -> list[str]:
+    # Chunk lengths vary a lot within a real document
+    rng = random.Random(seed)
+    words = " ".join(contexts).split()
+    chunks = []
+    for _ in range(n):
+        start = rng.randrange(len(words))
+        chunks.append(" ".join(words[start : start + rng.randint(5, 200)]))
+    return chunks
+
+
+def bench_chunks(chunks: list[str], step: int) -> dict:
+    results = {}
+    for name, order in (
+        ("document order", np.arange(len(chunks))),
+        ("length sorted", np.argsort([len(c) for c in chunks], kind="stable")),
+    ):
+        started = time.perf_counter()
+        for start in range(0, len(chunks), step):
+            rag.embed_chunks([chunks[i] for i in order[start : start + step]])
+        elapsed = time.perf_counter() - started
+        results[name] = len(chunks) / elapsed
+    return results
+
+
+async def bench_queries(questions: list[str], concurrency: int, cached: bool) -> float:
+    rag._QUERY_CACHE.clear()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(question: str) -> None:
+        async with semaphore:
+            if cached:
+                await rag.embed_query(question)
+            else:
+                await get_inference_executor().run(rag.embed_question, question)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in questions))
+    return len(questions) / (time.perf_counter() - started)
+
+
+async def main_async(args) -> None:
+    contexts = [item["context"] for item in json.loads(DATA.read_text())["qa"]]
+    questions = [item["question"] for item in json.loads(DATA.read_text())["qa"]]
+    rag.embed_question("warmup")
+
+    chunks = make_chunks(contexts, args.chunks, args.seed)
+    print(
+        f"\nChunk embedding ({len(chunks)} chunks, steps of {config.EMBED_BATCH_SIZE})"
+    )
+    for name, rate in bench_chunks(chunks, config.EMBED_BATCH_SIZE).items():
+        print(f"{name:<18}{rate:>10.1f} sentences/s")
+
+    rng = random.Random(args.seed)
+    print(
+        f"\nQuestion embedding ({args.queries} requests, concurrency {args.concurrency})"
+    )
+    print(f"{'repeat':>8}{'per request':>14}{'service':>10}{'hit ratio':>11}")
+    for repeat in args.repeat_ratio:
+        pool = questions[: max(1, int(len(questions) * (1 - repeat)))]
+        workload = [
+            (
+                rng.choice(pool)
+                if rng.random() < repeat
+                else f"{rng.choice(questions)} {i}"
+            )
+            for i in range(args.queries)
+        ]
+        direct = await bench_queries(workload, args.concurrency, cached=False)
+        service = await bench_queries(workload, args.concurrency, cached=True)
+        hit_ratio = rag._QUERY_CACHE.stats()["hit_ratio"]
+        print(f"{repeat:>8.2f}{direct:>14.1f}{service:>10.1f}{hit_ratio:>11.2f}")
+
+    print("\nEncoder throughput:", json.dumps(rag._ENCODE_STATS.as_dict(), indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chunk embedding throughput with and without length sorting, and "
+        "question embedding throughput of one encode per request against the "
+        "micro-batched, cached query service"
+    )
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--repeat-ratio", type=float, nargs="+", default=[0.0, 0.5, 0.9]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Every concurrent request must fit the executor queue, or it answers 503
+    config.INFERENCE_QUEUE_SIZE = max(config.INFERENCE_QUEUE_SIZE, args.concurrency)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import time
+from functools import partial
+
+import numpy as np
+
+os.environ.setdefault("ENV_STATE", "dev")
+
+from app.internal.cpu import import_faiss  # noqa: E402
+from app.pipelines import rag  # noqa: E402
+from app.services.embedding_format import (  # noqa: E402
+    decode_embeddings,
+    encode_embeddings,
+)
+
+EMBED_DIM = 384
+DTYPES = ("float32", "float16", "int8")
+
+
+def make_corpus(n: int, queries: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    # Uneven norms are what separates L2 from cosine ranking
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 50), EMBED_DIM), dtype=np.float32)
+    labels = rng.integers(len(centers), size=n)
+    data = centers[labels] + 0.5 * rng.standard_normal((n, EMBED_DIM), np.float32)
+    data *= rng.uniform(0.5, 2.0, size=(n, 1)).astype(np.float32)
+
+    picks = rng.choice(n, queries, replace=False)
+    noise = 0.1 * rng.standard_normal((queries, EMBED_DIM), np.float32)
+    return data, data[picks] + noise
+
+
+def normalized(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def timed(fn, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Size, encode/decode time and cosine recall@k of each embedding "
+        "storage dtype, against the old unnormalized L2 index"
+    )
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    faiss = import_faiss()
+    for n in args.chunks:
+        data, queries = make_corpus(n, args.queries, args.seed)
+        truth = np.argsort(-(normalized(queries) @ normalized(data).T), axis=1)
+        truth = truth[:, : args.k]
+
+        print(f"\n{n} chunks, {args.queries} queries, cosine recall@{args.k}")
+        print(
+            f"{'storage':<18}{'MB':>8}{'B/chunk':>9}{'enc ms':>9}{'dec ms':>9}"
+            f"{'recall':>9}"
+        )
+
+        flat = faiss.IndexFlatL2(EMBED_DIM)
+        flat.add(data)
+        _, found = flat.search(queries, args.k)
+        size = len(encode_embeddings(data, rag.MODEL_NAME))
+        print(
+            f"{'float32 L2 (old)':<18}{size / 1e6:>8.2f}{size / n:>9.0f}"
+            f"{'-':>9}{'-':>9}{recall(found, truth):>9.3f}"
+        )
+
+        unit = normalized(data)
+        for dtype in DTYPES:
+            blob, encode_ms = timed(
+                partial(encode_embeddings, unit, rag.MODEL_NAME, dtype), args.repeat
+            )
+            (stored, _), decode_ms = timed(
+                partial(decode_embeddings, blob), args.repeat
+            )
+            idx = rag.build_faiss_index(stored)
+            _, found = idx.search(queries, args.k)
+            print(
+                f"{dtype + ' cosine':<18}{len(blob) / 1e6:>8.2f}{len(blob) / n:>9.0f}"
+                f"{encode_ms:>9.2f}{decode_ms:>9.2f}{recall(found, truth):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
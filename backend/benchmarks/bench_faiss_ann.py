@@ -0,0 +1,117 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("ENV_STATE", "dev")
+
+from app.internal.config import config  # noqa: E402
+from app.internal.cpu import import_faiss  # noqa: E402
+from app.pipelines import rag  # noqa: E402
+
+EMBED_DIM = 384
+
+
+def make_corpus(n: int, queries: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    # Clustered vectors resemble chunk embeddings better than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 50), EMBED_DIM), dtype=np.float32)
+    labels = rng.integers(len(centers), size=n)
+    data = centers[labels] + 0.5 * rng.standard_normal((n, EMBED_DIM), np.float32)
+
+    picks = rng.choice(n, queries, replace=False)
+    noise = 0.1 * rng.standard_normal((queries, EMBED_DIM), np.float32)
+    return data, data[picks] + noise
+
+
+def search_latencies(idx, queries: np.ndarray, k: int) -> tuple[np.ndarray, list]:
+    ids, latencies = [], []
+    for q in queries:
+        started = time.perf_counter()
+        _, row = idx.search(q[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids.append(row[0])
+    return np.array(ids), latencies
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def build(kind: str, data: np.ndarray):
+    config.FAISS_INDEX_TYPE = kind
+    params = rag.choose_index_params(*data.shape)
+
+    started = time.perf_counter()
+    idx = rag.build_faiss_index(data, params)
+    build_s = time.perf_counter() - started
+
+    size_mb = len(rag.serialize_faiss_index(idx, params)) / 1e6
+    return idx, params, build_s, size_mb
+
+
+def report(name, build_s, size_mb, setting, found, truth, latencies) -> None:
+    print(
+        f"{name:<16}{build_s:>9.2f}{size_mb:>9.1f}{setting:>12}"
+        f"{recall(found, truth):>10.3f}{np.percentile(latencies, 50):>9.3f}"
+        f"{np.percentile(latencies, 95):>9.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recall@k and per-query latency of the HNSW and IVF-PQ index "
+        "modes against the exact Flat index, over synthetic clustered embeddings"
+    )
+    parser.add_argument(
+        "--chunks", type=int, nargs="+", default=[10_000, 50_000, 100_000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    faiss = import_faiss()
+    for n in args.chunks:
+        data, queries = make_corpus(n, args.queries, args.seed)
+        print(f"\n{n} chunks, {args.queries} queries, recall@{args.k}")
+        print(
+            f"{'index':<16}{'build s':>9}{'size MB':>9}{'setting':>12}"
+            f"{'recall':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        )
+
+        idx, params, build_s, size_mb = build(rag.FLAT, data)
+        truth, latencies = search_latencies(idx, queries, args.k)
+        report(params.factory, build_s, size_mb, "exact", truth, truth, latencies)
+
+        idx, params, build_s, size_mb = build(rag.HNSW, data)
+        for ef in args.ef_search:
+            faiss.ParameterSpace().set_index_parameter(idx, "efSearch", ef)
+            found, latencies = search_latencies(idx, queries, args.k)
+            report(
+                params.factory, build_s, size_mb, f"ef={ef}", found, truth, latencies
+            )
+
+        idx, params, build_s, size_mb = build(rag.IVFPQ, data)
+        if params.kind != rag.IVFPQ:
+            continue
+        for nprobe in args.nprobe:
+            faiss.ParameterSpace().set_index_parameter(idx, "nprobe", nprobe)
+            found, latencies = search_latencies(idx, queries, args.k)
+            report(
+                params.factory,
+                build_s,
+                size_mb,
+                f"nprobe={nprobe}",
+                found,
+                truth,
+                latencies,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import pickle
+import time
+
+import faiss
+import numpy as np
+
+EMBED_DIM = 384
+
+
+def rebuild_per_question(blob: bytes, q_emb: np.ndarray, k: int) -> None:
+    embeddings = pickle.loads(blob)
+    idx = faiss.IndexFlatL2(EMBED_DIM)
+    idx.add(embeddings)
+    idx.search(q_emb, k)
+
+
+def load_serialized_index(blob: bytes, q_emb: np.ndarray, k: int) -> None:
+    idx = faiss.deserialize_index(np.frombuffer(blob, dtype=np.uint8))
+    idx.search(q_emb, k)
+
+
+def search_cached_index(idx: faiss.Index, q_emb: np.ndarray, k: int) -> None:
+    idx.search(q_emb, k)
+
+
+def timeit(fn, *args, repeat: int) -> float:
+    fn(*args)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-question retrieval latency against chunk count"
+    )
+    parser.add_argument(
+        "--chunks", type=int, nargs="+", default=[100, 1_000, 10_000, 50_000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    q_emb = rng.standard_normal((1, EMBED_DIM), dtype=np.float32)
+
+    print(f"{'chunks':>8} {'rebuild ms':>12} {'deserialize ms':>15} {'cached ms':>10}")
+    for n in args.chunks:
+        embeddings = rng.standard_normal((n, EMBED_DIM), dtype=np.float32)
+        idx = faiss.IndexFlatL2(EMBED_DIM)
+        idx.add(embeddings)
+
+        pickled = pickle.dumps(embeddings)
+        serialized = faiss.serialize_index(idx).tobytes()
+
+        rebuild = timeit(
+            rebuild_per_question, pickled, q_emb, args.k, repeat=args.repeat
+        )
+        deserialize = timeit(
+            load_serialized_index, serialized, q_emb, args.k, repeat=args.repeat
+        )
+        cached = timeit(search_cached_index, idx, q_emb, args.k, repeat=args.repeat)
+
+        print(f"{n:>8} {rebuild:>12.3f} {deserialize:>15.3f} {cached:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "faiss")
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(module: str) -> dict[str, tuple[int, int]]:
+    env = {**os.environ, "ENV_STATE": os.environ.get("ENV_STATE", "test")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    profile = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            profile[name] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cold import time of the backend measured with -X importtime"
+    )
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="exit with status 1 if the median import time exceeds this budget",
+    )
+    args = parser.parse_args()
+
+    runs = [import_profile(args.module) for _ in range(args.repeat)]
+    totals = [run[args.module][1] / 1000 for run in runs]
+    median = statistics.median(totals)
+    print(
+        f"import {args.module}: median {median:.0f} ms, "
+        f"min {min(totals):.0f} ms, max {max(totals):.0f} ms over {args.repeat} runs"
+    )
+
+    last = runs[-1]
+    top_level = {name.split(".")[0] for name in last}
+    print(f"\n{'package':<32}{'cumulative ms':>14}")
+    slowest = sorted(
+        ((name, last[name][1]) for name in top_level if name in last),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    for name, cumulative_us in slowest[: args.top]:
+        print(f"{name:<32}{cumulative_us / 1000:>14.1f}")
+
+    heavy = [name for name in HEAVY_MODULES if name in last]
+    failed = False
+    if heavy:
+        print(f"\nheavy ML modules imported: {', '.join(heavy)}")
+        failed = args.module == "app.main"
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\nmedian {median:.0f} ms exceeds the {args.max_ms:.0f} ms budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
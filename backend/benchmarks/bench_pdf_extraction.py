@@ -0,0 +1,104 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fitz
+
+os.environ.setdefault("ENV_STATE", "dev")
+
+from app.services.extraction import extract_page_slice  # noqa: E402
+
+EXAMPLE_DOCS = Path(__file__).resolve().parents[2] / "example_docs"
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. "
+)
+
+
+def make_synthetic_pdf(pages: int, directory: str) -> str:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        rect = fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50)
+        page.insert_textbox(rect, f"Page {i}\n" + LOREM * 30, fontsize=9)
+    path = os.path.join(directory, f"synthetic-{pages}.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def extract_sequential(path: str) -> list[str]:
+    with fitz.open(path) as doc:
+        return [page.get_text() for page in doc]
+
+
+def extract_parallel(
+    pool: ProcessPoolExecutor, path: str, batch_size: int
+) -> list[str]:
+    with fitz.open(path) as doc:
+        page_count = doc.page_count
+
+    slices = [
+        (start, min(start + batch_size, page_count))
+        for start in range(0, page_count, batch_size)
+    ]
+    futures = [
+        pool.submit(extract_page_slice, path, start, end) for start, end in slices
+    ]
+    return [page for future in futures for page in future.result()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sequential vs process-pool PDF text extraction wall time"
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = sorted(str(p) for p in EXAMPLE_DOCS.glob("*.pdf"))
+        paths += [make_synthetic_pdf(n, tmp) for n in args.pages]
+
+        pools = {
+            workers: ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            for workers in range(1, args.max_workers + 1)
+        }
+        try:
+            header = f"{'document':<32} {'pages':>6} {'sequential':>11}"
+            header += "".join(f" {f'{w} proc':>9}" for w in pools)
+            print(header + "   (ms)")
+
+            for path in paths:
+                expected = extract_sequential(path)
+
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    extract_sequential(path)
+                row = f"{Path(path).name[:32]:<32} {len(expected):>6} "
+                row += f"{(time.perf_counter() - started) / args.repeat * 1000:>11.1f}"
+
+                for pool in pools.values():
+                    assert extract_parallel(pool, path, args.batch_size) == expected
+                    started = time.perf_counter()
+                    for _ in range(args.repeat):
+                        extract_parallel(pool, path, args.batch_size)
+                    elapsed = (time.perf_counter() - started) / args.repeat * 1000
+                    row += f" {elapsed:>9.1f}"
+
+                print(row)
+        finally:
+            for pool in pools.values():
+                pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 
 import requests
@@ -20,23 +21,61 @@ def upload_pdf(pdf_file, session_id=None):
     return token, session_id, full_text
 
 
+NO_ENTITIES = [{"status": "No entities found"}]
+
+
+def iter_events(resp):
+    event, data = None, []
+    for line in resp.iter_lines(decode_unicode=True):
+        if not line:
+            if event is not None:
+                yield event, json.loads("\n".join(data))
+            event, data = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:") :].strip())
+
+
 def ask_question(token, question):
     if not token:
         raise RuntimeError("No session token—call upload_pdf() first")
 
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = {"Authorization": f"Bearer {token}", "Accept": "text/event-stream"}
     data = {"question": question}
-    resp = requests.post(f"{DOC_INSIGHT_SERVICE_URL}/ask", headers=headers, data=data)
-    resp.raise_for_status()
-    result = resp.json()
 
-    simple, rag = result["results"]
+    # Index 0 is the full-context answer, index 1 the RAG answer
+    answers = [{"answer": "", "score": "", "entities": None} for _ in range(2)]
+
+    def outputs(final=False):
+        values = []
+        for a in answers:
+            entities = a["entities"]
+            if entities is not None or final:
+                entities = entities or NO_ENTITIES
+            values += [a["answer"], a["score"], entities]
+        return values
+
+    with requests.post(
+        f"{DOC_INSIGHT_SERVICE_URL}/ask/stream",
+        headers=headers,
+        data=data,
+        stream=True,
+    ) as resp:
+        resp.raise_for_status()
 
-    return [
-        simple["answer"],
-        simple["score"],
-        simple["entities"] or [{"status": "No entities found"}],
-        rag["answer"],
-        rag["score"],
-        rag["entities"] or [{"status": "No entities found"}],
-    ]
+        for event, payload in iter_events(resp):
+            if event == "answer":
+                answers[payload["index"]].update(
+                    answer=payload["answer"],
+                    score=payload["score"],
+                    entities=payload.get("entities"),
+                )
+                yield outputs()
+            elif event == "entities":
+                answers[payload["index"]]["entities"] = payload["entities"]
+                yield outputs()
+            elif event == "error":
+                raise RuntimeError(payload["detail"])
+            elif event == "done":
+                yield outputs(final=True)
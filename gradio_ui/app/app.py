@@ -27,9 +27,8 @@ def send_question(token, question):
         raise gr.Error("No document session found. Please extract text first.")
     if not question or not question.strip():
         raise gr.Error("Please type a question before clicking **Ask**.")
-    results = ask_question(token, question)
-
-    return results
+    # Each model's answer shows up as soon as the backend streams it
+    yield from ask_question(token, question)
 
 
 with gr.Blocks() as demo: